@@ -0,0 +1,387 @@
+from collections import Counter
+import os
+import random
+import numpy as np
+from Cell import Path, Wall
+from Board import DIRECTION_BITS, DIRECTIONS_BY_MASK, BoardSnapshot
+from DistanceMaps import DistanceMaps
+from Sprite import Food, Sprite
+
+WALL_CHAR = ord("#")
+PATH_CHAR = ord(" ")
+NEWLINE_CHAR = ord("\n")
+
+
+class ArrayBoard:
+    """
+        A class to represent a board in Pacman game backed by NumPy arrays.
+        It keeps the API of Board, but does not hold a Python object per cell:
+        walls are a boolean array, food is a uint8 array with number of food sprites per cell
+        and other sprites, including subclasses of Food, are kept in a side table keyed by coordinates.
+        ...
+        Attributes
+        ----------
+        __walls : numpy.ndarray
+            boolean array, True for wall cells.
+        __food : numpy.ndarray
+            uint8 array, number of food sprites in each cell.
+        __food_count : int
+            number of food sprites on the board.
+        __sprites : dict
+            list of sprites other than plain food, keyed by cell coordinates.
+        __counts : Counter
+            number of sprites other than plain food on the board, keyed by sprite class.
+        __direction_mask : numpy.ndarray
+            uint8 array, bit mask of possible directions from each cell (see DIRECTION_BITS).
+        __distances : DistanceMaps
+            cache of shortest path distance maps.
+
+        Methods
+        -------
+        board_from_str():
+            Method that returns game board from string input.
+        board_from_bytes():
+            Method that returns game board from bytes.
+        board_from_file():
+            Method that returns game board from a file.
+        walls():
+            Returns boolean array of walls.
+        food():
+            Returns array with number of food sprites per cell.
+        direction_mask():
+            Returns array with bit mask of possible directions from each cell.
+        width():
+            Returns board width.
+        height():
+            Returns board height.
+        at():
+            Returns a cell with the sprites it holds, built on demand.
+        directions():
+            Returns a tuple of possible directions from current position on the board.
+        insert_food():
+            Fills each path cell with one food sprite.
+        insert():
+            Inserts a sprite into a certain board cell.
+        remove():
+            Removes a sprite from its board cell.
+        move():
+            Moves a sprite into a certain board cell.
+        random_cell():
+            Returns coordinates of random path cell.
+        count_by_type():
+            Returns a number of sprites of certain type present on the board.
+        positions_by_type():
+            Returns coordinates of cells holding sprites of certain type.
+        distance_map():
+            Returns shortest path distances from a cell to every cell.
+        distance_maps():
+            Returns cache of shortest path distance maps.
+        snapshot():
+            Returns sprites present on the board.
+        restore():
+            Puts sprites back as they were when snapshot() was taken.
+    """
+
+    __wall = Wall()
+
+    def __init__(self, walls: np.ndarray, food: np.ndarray = None, direction_mask: np.ndarray = None):
+        """
+        Constructs necessary attributes for the board object.
+
+        Parameters
+        ----------
+            walls : numpy.ndarray
+                boolean array, True for wall cells
+            food : numpy.ndarray
+                number of food sprites per cell, no food if not given
+            direction_mask : numpy.ndarray
+                bit mask of possible directions from each cell, built from walls if not given
+        """
+        if food is None:
+            food = np.zeros(walls.shape, dtype=np.uint8)
+
+        self.__walls = walls.astype(bool, copy=False)
+        self.__food = food.astype(np.uint8, copy=False)
+        self.__food_count = int(self.__food.sum())
+        self.__sprites = {}
+        self.__counts = Counter()
+        if direction_mask is None:
+            direction_mask = self.__build_direction_mask(self.__walls)
+        self.__direction_mask = direction_mask.astype(np.uint8, copy=False)
+        self.__distances = DistanceMaps(self)
+
+    @staticmethod
+    def __build_direction_mask(walls: np.ndarray) -> np.ndarray:
+        """
+        Returns bit mask of possible directions for each cell, cells outside of the board count as walls.
+
+        Parameters
+        ----------
+           walls: boolean array, True for wall cells
+        """
+
+        # pad with walls, so that border cells have no directions leading outside of the board
+        path = np.pad(~walls, 1, constant_values=False)
+        height, width = walls.shape
+        mask = np.zeros(walls.shape, dtype=np.uint8)
+
+        for d, bit in DIRECTION_BITS:
+            dx, dy = d.value
+            mask |= path[1 + dx:1 + dx + height, 1 + dy:1 + dy + width] * np.uint8(bit)
+
+        return mask
+
+    @staticmethod
+    def board_from_str(lines: str):
+        """
+        Returns board read from string.
+
+        Parameters
+        ----------
+           lines: string representing pacman game board
+        """
+
+        return ArrayBoard.board_from_bytes(lines.encode("latin-1", errors="replace"))
+
+    @staticmethod
+    def board_from_bytes(data) -> "ArrayBoard":
+        """
+        Returns board read from bytes in the format of board_from_str(). Rows are found and validated
+        with array operations, no Python object is created per character.
+
+        Parameters
+        ----------
+           data: bytes, bytearray, mmap or uint8 array
+        """
+
+        data = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data.ravel()
+
+        newlines = np.flatnonzero(data == NEWLINE_CHAR)
+        starts = np.concatenate(([0], newlines + 1))
+        lengths = np.concatenate((newlines, [len(data)])) - starts
+
+        # empty lines are skipped
+        lengths = lengths[lengths != 0]
+        if not len(lengths):
+            raise ValueError("Board has no rows")
+
+        width = int(lengths[0])
+        wrong = np.flatnonzero(lengths != width)
+        if len(wrong):
+            n = int(wrong[0])
+            raise ValueError(f"Board row {n} has length {int(lengths[n])}, expected {width}")
+
+        grid = data[data != NEWLINE_CHAR].reshape(len(lengths), width)
+
+        unknown = (grid != WALL_CHAR) & (grid != PATH_CHAR)
+        if unknown.any():
+            x, y = np.argwhere(unknown)[0]
+            raise ValueError(f"Unknown board character {chr(grid[x, y])!r} at row {x}, column {y}")
+
+        return ArrayBoard(grid == WALL_CHAR)
+
+    @staticmethod
+    def board_from_file(path: str) -> "ArrayBoard":
+        """
+        Returns board read from a file in the format of board_from_str(). The file is memory-mapped,
+        so only the arrays of the board are held in memory once it is loaded.
+
+        Parameters
+        ----------
+           path: path of board file
+        """
+
+        try:
+            if os.path.getsize(path) == 0:
+                raise ValueError("Board has no rows")
+
+            return ArrayBoard.board_from_bytes(np.memmap(path, dtype=np.uint8, mode="r"))
+        except ValueError as e:
+            raise ValueError(f"{path}: {e}") from e
+
+    @property
+    def walls(self):
+        return self.__walls
+
+    @property
+    def food(self):
+        return self.__food
+
+    @property
+    def direction_mask(self):
+        return self.__direction_mask
+
+    @property
+    def distance_maps(self) -> DistanceMaps:
+        return self.__distances
+
+    def width(self):
+        return self.__walls.shape[1]
+
+    def height(self):
+        return self.__walls.shape[0]
+
+    def at(self, i: int, j: int):
+        """
+        Returns a cell holding sprites present at given coordinates.
+        Plain food sprites are created on demand, removing them from the returned cell has no effect on the board.
+
+        Parameters
+        ----------
+           i: row coordinate
+           j: column coordinate
+        """
+
+        if self.__walls[i, j]:
+            return self.__wall
+
+        sprites = [Food("f", i, j) for _ in range(self.__food[i, j])]
+        sprites.extend(self.__sprites.get((i, j), ()))
+
+        return Path(sprites)
+
+    def directions(self, i: int, j: int) -> tuple:
+        """
+        Returns tuple of possible directions from current cell.
+        Cells outside of the board are treated as walls.
+
+        Parameters
+        ----------
+           i: row coordinate
+           j: column coordinate
+        """
+
+        return DIRECTIONS_BY_MASK[self.__direction_mask[i, j]]
+
+    def insert_food(self):
+        path = ~self.__walls
+        self.__food += path
+        self.__food_count += int(np.count_nonzero(path))
+
+    def insert(self, sprite: Sprite):
+        if type(sprite) is Food:
+            self.__food[sprite.x, sprite.y] += 1
+            self.__food_count += 1
+            return
+
+        self.__sprites.setdefault((sprite.x, sprite.y), []).append(sprite)
+        self.__counts[type(sprite)] += 1
+
+    def remove(self, sprite: Sprite):
+        if type(sprite) is Food:
+            if self.__food[sprite.x, sprite.y] == 0:
+                raise ValueError(f"No food at row {sprite.x}, column {sprite.y}")
+            self.__food[sprite.x, sprite.y] -= 1
+            self.__food_count -= 1
+            return
+
+        self.__remove_from_table(sprite, sprite.x, sprite.y)
+        self.__counts[type(sprite)] -= 1
+
+    def move(self, sprite: Sprite, xnew: int, ynew: int):
+        """
+        Moves sprite into new cell and sets its new coordinates.
+
+        Parameters
+        ----------
+           sprite: sprite to be moved
+           xnew: new row coordinate
+           ynew: new column coordinate
+        """
+
+        self.__sprites.setdefault((xnew, ynew), []).append(sprite)
+        self.__remove_from_table(sprite, sprite.x, sprite.y)
+
+        sprite.x, sprite.y = xnew, ynew
+
+    def __remove_from_table(self, sprite: Sprite, x: int, y: int):
+        sprites = self.__sprites[(x, y)]
+        sprites.remove(sprite)
+        if not sprites:
+            del self.__sprites[(x, y)]
+
+    def random_cell(self, rng: random.Random = random) -> tuple[int, int]:
+        """
+        Returns coordinates of random path cell.
+
+        Parameters
+        ----------
+           rng: random number generator, global random module if not given
+        """
+
+        path_indexes = np.flatnonzero(~self.__walls)
+        xs, ys = divmod(int(rng.choice(path_indexes)), self.width())
+
+        return xs, ys
+
+    def count_by_type(self, sprite_type) -> int:
+        """
+        Returns number of sprites of sprite_type (or its subclasses) present on the board.
+
+        Parameters
+        ----------
+           sprite_type: sprite class
+        """
+
+        counter = sum(n for sprite_class, n in self.__counts.items() if issubclass(sprite_class, sprite_type))
+
+        if issubclass(Food, sprite_type):
+            counter += self.__food_count
+
+        return counter
+
+    def positions_by_type(self, sprite_type) -> set[tuple[int, int]]:
+        """
+        Returns coordinates of cells holding sprites of sprite_type (or its subclasses).
+
+        Parameters
+        ----------
+           sprite_type: sprite class
+        """
+
+        positions = {xy for xy, sprites in self.__sprites.items()
+                     if any(isinstance(si, sprite_type) for si in sprites)}
+
+        if issubclass(Food, sprite_type):
+            positions.update(zip(*map(np.ndarray.tolist, np.nonzero(self.__food))))
+
+        return positions
+
+    def distance_map(self, x: int, y: int, cells: list = None):
+        """
+        Returns number of moves from cell (x, y) to every cell, indexed by i * width + j, -1 if unreachable.
+        Maps are cached, as walls never change. If cells are given, only their distances are final.
+
+        Parameters
+        ----------
+           x: row coordinate
+           y: column coordinate
+           cells: flat indexes i * width + j of cells whose distances are needed, all cells if not given
+        """
+
+        return self.__distances.distance_map(x, y, cells)
+
+    def snapshot(self) -> BoardSnapshot:
+        return BoardSnapshot(self.__food.tobytes(), tuple((si, xs, ys) for (xs, ys), sprites in self.__sprites.items()
+                                                          for si in sprites))
+
+    def restore(self, snapshot: BoardSnapshot):
+        """
+        Puts sprites back into cells they held when snapshot was taken.
+
+        Parameters
+        ----------
+           snapshot: snapshot taken from this board
+        """
+
+        if len(snapshot.food) != self.__food.size:
+            raise ValueError("Snapshot was taken from a board of different size")
+
+        self.__food[...] = np.frombuffer(snapshot.food, dtype=np.uint8).reshape(self.__food.shape)
+        self.__food_count = int(self.__food.sum())
+
+        self.__sprites = {}
+        self.__counts = Counter()
+        for si, xs, ys in snapshot.sprites:
+            si.x, si.y = xs, ys
+            self.insert(si)
@@ -0,0 +1,351 @@
+from dataclasses import dataclass
+import numpy as np
+from ArrayBoard import ArrayBoard
+from Board import DIRECTION_BITS, DIRECTIONS_BY_MASK
+from GameEngine import DEFAULT_GHOST_STRATEGIES, GameResult, GameStatus, new_seed
+from SpriteMove import ManualWalk, PersistentWalk, RandomWalk
+
+# codes of game states used in status arrays
+STATUSES = (GameStatus.RUNNING, GameStatus.WON, GameStatus.LOST)
+RUNNING, WON, LOST = range(len(STATUSES))
+
+# number of possible directions for each direction mask
+POPCOUNT = np.array([len(ds) for ds in DIRECTIONS_BY_MASK], dtype=np.int64)
+
+# index (in DIRECTION_BITS) of k-th possible direction for each direction mask, -1 if there is none
+NTH_DIRECTION = np.full((len(DIRECTIONS_BY_MASK), len(DIRECTION_BITS)), -1, dtype=np.int64)
+for _mask, _ds in enumerate(DIRECTIONS_BY_MASK):
+    for _k, _d in enumerate(_ds):
+        NTH_DIRECTION[_mask, _k] = [d for d, bit in DIRECTION_BITS].index(_d)
+
+DIRECTION_MASK_BITS = np.array([bit for d, bit in DIRECTION_BITS], dtype=np.int64)
+
+
+@dataclass
+class BatchResult:
+    """
+        A class to represent outcomes of a batch of games, one array entry per game.
+        ...
+        Attributes
+        ----------
+        points : numpy.ndarray
+            points earned by PacMan
+        lives : numpy.ndarray
+            PacMan lives remaining
+        ticks : numpy.ndarray
+            number of ticks simulated
+        status : numpy.ndarray
+            state codes of games, indexes into STATUSES
+        seed : int
+            seed of the batch
+    """
+    points: np.ndarray
+    lives: np.ndarray
+    ticks: np.ndarray
+    status: np.ndarray
+    seed: int = None
+
+    def __len__(self):
+        return len(self.status)
+
+    @property
+    def won(self) -> np.ndarray:
+        return self.status == WON
+
+    @property
+    def lost(self) -> np.ndarray:
+        return self.status == LOST
+
+    def results(self) -> list[GameResult]:
+        return [GameResult(int(p), int(li), int(t), STATUSES[s], self.seed)
+                for p, li, t, s in zip(self.points, self.lives, self.ticks, self.status)]
+
+
+class BatchEngine:
+    """
+        A class to run many independent Pacman games on the same board layout in lockstep.
+        State of all games is kept in NumPy arrays and each sprite is moved in all games at once,
+        following the rules of TravelingSprite.mover and collision solvers (EatFood, PacManHitsGhost,
+        GhostHitsPacMan). Sprites move in the order of ghost strategies, PacMan moves last.
+        Cells are addressed by flat index x * width + y.
+        ...
+        Attributes
+        ----------
+        _n_games : int
+            number of games
+        _ghost_strategies : tuple
+            moving strategy class of each ghost: RandomWalk or PersistentWalk
+        _pacman_strategy : type
+            moving strategy class of PacMan: RandomWalk, PersistentWalk or ManualWalk
+        _seed : int
+            seed of the batch
+        _rng : numpy.random.Generator
+            random number generator shared by all games
+        _food : numpy.ndarray
+            (games, cells) array, number of food sprites per cell
+        _ghosts : numpy.ndarray
+            (games, ghosts) array, flat cell index of each ghost
+        _ghost_directions : numpy.ndarray
+            (games, ghosts) array, current direction index of persistent ghosts
+        _pacman : numpy.ndarray
+            flat cell index of PacMan in each game
+        _pacman_direction : numpy.ndarray
+            current direction index of PacMan in each game, -1 if PacMan does not move
+        _lives, _points, _ticks : numpy.ndarray
+            PacMan lives, points earned and ticks simulated in each game
+        _status : numpy.ndarray
+            state code of each game, index into STATUSES
+
+        Methods
+        -------
+        new_games():
+            Returns engine for a batch of new games on a board read from string.
+        n_games():
+            Returns number of games.
+        seed():
+            Returns seed of the batch.
+        reset():
+            Starts new games in place of some games of the batch.
+        step():
+            Advances all running games by one tick.
+        run():
+            Advances games until all of them end or tick limit is reached.
+        result():
+            Returns result record of all games.
+    """
+
+    def __init__(self, board: ArrayBoard, n_games: int,
+                 ghost_strategies: tuple = DEFAULT_GHOST_STRATEGIES,
+                 pacman_strategy: type = RandomWalk, lives: int = 3, seed: int = None):
+        """
+        Constructs necessary attributes for the engine, fills boards with food
+        and places sprites on random path cells.
+
+        Parameters
+        ----------
+            board : ArrayBoard
+                board layout shared by all games
+            n_games : int
+                number of games
+            ghost_strategies : tuple
+                moving strategy class of each ghost
+            pacman_strategy : type
+                moving strategy class of PacMan
+            lives : int
+                initial number of PacMan lives
+            seed : int
+                seed of random number generator, drawn from system randomness if not given
+        """
+        for strategy in (*ghost_strategies, pacman_strategy):
+            if not issubclass(strategy, (RandomWalk, PersistentWalk, ManualWalk)):
+                raise ValueError(f"Strategy {strategy.__name__} can not be run in a batch")
+
+        self._n_games = n_games
+        self._ghost_strategies = tuple(ghost_strategies)
+        self._pacman_strategy = pacman_strategy
+        if seed is None:
+            seed = new_seed()
+
+        self._seed = seed
+        self._rng = np.random.default_rng(seed)
+
+        width = board.width()
+        self._direction_mask = board.direction_mask.ravel().astype(np.int64)
+        self._offsets = np.array([d.value[0] * width + d.value[1] for d, bit in DIRECTION_BITS], dtype=np.int64)
+
+        self._path = ~board.walls.ravel()
+        self._path_cells = np.flatnonzero(self._path)
+        self._start_lives = lives
+
+        n_ghosts = len(self._ghost_strategies)
+        self._food = np.empty((n_games, len(self._path)), dtype=np.uint8)
+        self._food_count = np.empty(n_games, dtype=np.int64)
+        self._ghosts = np.empty((n_games, n_ghosts), dtype=np.int64)
+        self._pacman = np.empty(n_games, dtype=np.int64)
+        self._ghost_directions = np.empty((n_games, n_ghosts), dtype=np.int64)
+        self._pacman_direction = np.empty(n_games, dtype=np.int64)
+        self._lives = np.empty(n_games, dtype=np.int64)
+        self._points = np.empty(n_games, dtype=np.int64)
+        self._ticks = np.empty(n_games, dtype=np.int64)
+        self._status = np.empty(n_games, dtype=np.int8)
+
+        self.reset()
+
+    @staticmethod
+    def new_games(lines: str, n_games: int, **kwargs):
+        """
+        Returns engine for a batch of new games.
+
+        Parameters
+        ----------
+           lines: string representing pacman game board
+           n_games: number of games
+           kwargs: other arguments of BatchEngine
+        """
+
+        return BatchEngine(ArrayBoard.board_from_str(lines), n_games, **kwargs)
+
+    @property
+    def n_games(self):
+        return self._n_games
+
+    @property
+    def seed(self):
+        return self._seed
+
+    @property
+    def food(self):
+        return self._food
+
+    @property
+    def ghosts(self):
+        return self._ghosts
+
+    @property
+    def pacman(self):
+        return self._pacman
+
+    @property
+    def lives(self):
+        return self._lives
+
+    @property
+    def points(self):
+        return self._points
+
+    @property
+    def ticks(self):
+        return self._ticks
+
+    @property
+    def status(self):
+        return self._status
+
+    def reset(self, games: np.ndarray = None):
+        """
+        Starts new games in place of some games of the batch: fills their boards with food
+        and places their sprites on random path cells.
+
+        Parameters
+        ----------
+           games: indexes or boolean mask of games to restart, all games if not given
+        """
+
+        games = np.arange(self._n_games) if games is None else np.arange(self._n_games)[games]
+
+        self._food[games] = self._path
+        self._food_count[games] = len(self._path_cells)
+
+        # ghosts are placed first and PacMan last, as in default_sprites
+        n_ghosts = len(self._ghost_strategies)
+        start = self._rng.choice(self._path_cells, size=(len(games), n_ghosts + 1))
+        self._ghosts[games] = start[:, :n_ghosts]
+        self._pacman[games] = start[:, n_ghosts]
+
+        # persistent walks start moving right, manual walk does not move until given a direction
+        self._ghost_directions[games] = 0
+        self._pacman_direction[games] = 0 if self._pacman_strategy is not ManualWalk else -1
+
+        self._lives[games] = self._start_lives
+        self._points[games] = 0
+        self._ticks[games] = 0
+        self._status[games] = RUNNING
+
+    def __random_directions(self, masks: np.ndarray) -> np.ndarray:
+        k = (self._rng.random(len(masks)) * POPCOUNT[masks]).astype(np.int64)
+        return NTH_DIRECTION[masks, k]
+
+    def __target(self, strategy: type, position: np.ndarray, direction: np.ndarray) -> np.ndarray:
+        """
+        Returns target cells of a sprite in all games, updates direction array of persistent walks in place.
+
+        Parameters
+        ----------
+           strategy: moving strategy class
+           position: flat cell index of the sprite in each game
+           direction: current direction index of the sprite in each game
+        """
+
+        masks = self._direction_mask[position]
+
+        if issubclass(strategy, PersistentWalk):
+            blocked = masks & DIRECTION_MASK_BITS[direction] == 0
+            direction[blocked] = self.__random_directions(masks[blocked])
+        elif issubclass(strategy, ManualWalk):
+            allowed = (direction >= 0) & (masks & DIRECTION_MASK_BITS[direction] != 0)
+            return np.where(allowed, position + self._offsets[direction], position)
+        else:
+            direction = self.__random_directions(masks)
+
+        # sprites with no possible direction stay in place
+        return np.where(direction >= 0, position + self._offsets[direction], position)
+
+    def step(self, actions: np.ndarray = None) -> np.ndarray:
+        """
+        Advances all running games by one tick and returns array of game state codes.
+
+        Parameters
+        ----------
+           actions: direction index of manually controlled PacMan in each game, -1 to stop
+        """
+
+        if actions is not None:
+            self._pacman_direction[:] = actions
+
+        active = self._status == RUNNING
+        self._ticks += active
+
+        for g, strategy in enumerate(self._ghost_strategies):
+            position = self._ghosts[:, g]
+            target = self.__target(strategy, position, self._ghost_directions[:, g])
+
+            # GhostHitsPacMan
+            hit = active & (target == self._pacman)
+            self._lives -= hit
+            lost = hit & (self._lives == 0)
+
+            self._ghosts[:, g] = np.where(active, target, position)
+            self._status[lost] = LOST
+            active &= ~lost
+
+        target = self.__target(self._pacman_strategy, self._pacman, self._pacman_direction)
+
+        # PacManHitsGhost once for every ghost in the target cell, PacMan is removed when lives reach zero
+        hits = np.where(active, (self._ghosts == target[:, None]).sum(axis=1), 0)
+        lost = active & (hits >= self._lives)
+        self._lives -= hits
+
+        # EatFood, food is eaten even if PacMan is removed in the same move
+        games = np.flatnonzero(active)
+        eaten = self._food[games, target[games]].astype(np.int64)
+        self._food[games, target[games]] = 0
+        self._points[games] += eaten
+        self._food_count[games] -= eaten
+
+        self._pacman = np.where(active & ~lost, target, self._pacman)
+        self._status[lost] = LOST
+        active &= ~lost
+
+        self._status[active & (self._food_count == 0)] = WON
+
+        return self._status
+
+    def run(self, max_ticks: int) -> BatchResult:
+        """
+        Advances games until all of them end or max_ticks ticks have been simulated, returns result record.
+
+        Parameters
+        ----------
+           max_ticks: maximal number of ticks to simulate
+        """
+
+        for _ in range(max_ticks - int(self._ticks.max(initial=0))):
+            if not (self._status == RUNNING).any():
+                break
+            self.step()
+
+        return self.result()
+
+    def result(self) -> BatchResult:
+        return BatchResult(self._points.copy(), self._lives.copy(), self._ticks.copy(), self._status.copy(),
+                           self._seed)
@@ -1,10 +1,37 @@
-from dataclasses import dataclass
+from collections import Counter
+from dataclasses import InitVar, dataclass, field
+from itertools import compress
+from operator import ne
 import random
-import copy
 from Cell import Cell, Path, Wall
+from DistanceMaps import DistanceMaps
 from SpriteMove import Direction
 from Sprite import Food, Sprite
 
+# bit of direction mask for each direction, in the order directions() lists them
+DIRECTION_BITS = ((Direction.RIGHT, 1), (Direction.LEFT, 2), (Direction.UP, 4), (Direction.DOWN, 8))
+
+# tuple of possible directions for each of 16 direction masks
+DIRECTIONS_BY_MASK = tuple(tuple(d for d, bit in DIRECTION_BITS if mask & bit) for mask in range(16))
+
+
+@dataclass(frozen=True)
+class BoardSnapshot:
+    """
+        A class to represent sprites present on a board at some moment.
+        Walls never change, so they are not part of a snapshot, and a snapshot is restored
+        into the board it was taken from.
+        ...
+        Attributes
+        ----------
+        food : bytes
+            number of food sprites in each cell, indexed by i * width + j
+        sprites : tuple
+            (sprite, x, y) for every other sprite on the board, in order of sprites in each cell
+    """
+    food: bytes
+    sprites: tuple
+
 
 @dataclass
 class Board:
@@ -15,13 +42,41 @@ class Board:
         ----------
         __cells : list
             list of list of cells.
+        __counts : Counter
+            number of sprites on the board, keyed by sprite class.
+        __positions : dict
+            Counter of sprite coordinates, keyed by sprite class.
+        __masks : list
+            list of lists of bit masks of possible directions from each cell (see DIRECTION_BITS),
+            built once as walls never change.
+        __directions : list
+            list of lists of possible directions from each cell, tuples of DIRECTIONS_BY_MASK.
+        __distances : DistanceMaps
+            cache of shortest path distance maps, created on first use.
+        flyweight_food : bool
+            if True, food is kept as number of food sprites per cell instead of Food objects.
+        __food : bytearray
+            number of food sprites in each cell, indexed by i * width + j, None unless flyweight_food is set.
+        __food_objects : bytearray
+            number of Food objects in each cell, indexed by i * width + j, kept in sync by insert(), move()
+            and remove() unless flyweight_food is set, so that snapshots copy it instead of visiting cells.
+        __food_count : int
+            number of food sprites on the board, when flyweight_food is set.
+        direction_masks : InitVar
+            rows of direction masks of cells (bits of DIRECTION_BITS), built from cells if not given.
 
         Methods
         -------
         board_from_str():
             Method that returns game board from string input.
+        board_from_file():
+            Method that returns game board from a file.
+        board_from_walls():
+            Method that returns game board from wall flags of cells.
         cells():
             Returns board cells.
+        direction_mask():
+            Returns lists of bit masks of possible directions from each cell.
         width():
             Returns board width.
         height():
@@ -29,41 +84,162 @@ class Board:
         at():
             Returns a list of sprites in a certain cell.
         directions():
-            Returns a list of possible directions from current position on the board.
+            Returns a tuple of possible directions from current position on the board.
         insert_food():
             Fills each path cell with one food sprite.
         insert():
             Inserts a sprite into a certain board cell.
+        remove():
+            Removes a sprite from its board cell.
+        move():
+            Moves a sprite into a certain board cell.
         random_cell():
             Returns coordinates of random path cell.
         count_by_type():
             Returns a number of sprites of certain type present on the board.
+        positions_by_type():
+            Returns coordinates of cells holding sprites of certain type.
+        distance_map():
+            Returns shortest path distances from a cell to every cell.
+        distance_maps():
+            Returns cache of shortest path distance maps.
+        snapshot():
+            Returns sprites present on the board.
+        restore():
+            Puts sprites back as they were when snapshot() was taken.
+
+        Sprites have to be added, moved and removed through insert(), move() and remove(),
+        so that the counters stay in sync with the cells.
     """
     __cells: list[list[Cell]]
+    flyweight_food: bool = False
+    __counts: Counter = field(default_factory=Counter, init=False, repr=False)
+    __positions: dict = field(default_factory=dict, init=False, repr=False)
+    __masks: list = field(default_factory=list, init=False, repr=False)
+    __directions: list = field(default_factory=list, init=False, repr=False)
+    __distances: DistanceMaps = field(default=None, init=False, repr=False)
+    __food: bytearray = field(default=None, init=False, repr=False)
+    __food_objects: bytearray = field(default=None, init=False, repr=False)
+    __food_count: int = field(default=0, init=False, repr=False)
+    direction_masks: InitVar[list] = None
+
+    def __post_init__(self, direction_masks: list):
+        self.__masks = self.__build_masks() if direction_masks is None else direction_masks
+        self.__directions = [[DIRECTIONS_BY_MASK[mask] for mask in row] for row in self.__masks]
+
+        food = bytearray(self.width() * self.height() if self.__cells else 0)
+        if self.flyweight_food:
+            self.__food = food
+        else:
+            self.__food_objects = food
+
+        for xs, row in enumerate(self.__cells):
+            for ys, cell in enumerate(row):
+                sprites = cell.my_sprites()
+                if not sprites:
+                    continue
+
+                if self.__food is not None and any(type(si) is Food for si in sprites):
+                    # food objects given in cells are turned into counts
+                    n = sum(type(si) is Food for si in sprites)
+                    self.__food[xs * len(row) + ys] += n
+                    self.__food_count += n
+                    sprites[:] = [si for si in sprites if type(si) is not Food]
+
+                for si in sprites:
+                    self.__track(si, xs, ys)
+
+    def __track(self, sprite: Sprite, x: int, y: int):
+        sprite_class = type(sprite)
+        self.__counts[sprite_class] += 1
+        self.__positions.setdefault(sprite_class, Counter())[(x, y)] += 1
+        if sprite_class is Food:
+            self.__food_objects[x * len(self.__cells[0]) + y] += 1
+
+    def __untrack(self, sprite: Sprite, x: int, y: int):
+        sprite_class = type(sprite)
+        self.__counts[sprite_class] -= 1
+        if sprite_class is Food:
+            self.__food_objects[x * len(self.__cells[0]) + y] -= 1
+        positions = self.__positions[sprite_class]
+        positions[(x, y)] -= 1
+        if positions[(x, y)] == 0:
+            del positions[(x, y)]
 
-    @staticmethod
-    def board_from_str(lines: str):
+    @classmethod
+    def board_from_str(cls, lines: str):
         """
-        Returns list of lists of board cells.
+        Returns board read from string.
 
         Parameters
         ----------
            lines: string representing pacman game board
         """
 
-        class_factory = {" ": Path, "#": Wall}
-        board = Board([])
-        lines_split = lines.split("\n")
+        return cls.__from_lines(lines.split("\n"))
+
+    @classmethod
+    def board_from_file(cls, path: str):
+        """
+        Returns board read line by line from a file in the format of board_from_str().
+
+        Parameters
+        ----------
+           path: path of board file
+        """
+
+        with open(path, encoding="latin-1", newline="") as f:
+            try:
+                return cls.__from_lines(line.rstrip("\n") for line in f)
+            except ValueError as e:
+                raise ValueError(f"{path}: {e}") from e
+
+    @classmethod
+    def board_from_walls(cls, walls, direction_masks: list = None):
+        """
+        Returns board from wall flags of its cells, without parsing or validating a string.
+
+        Parameters
+        ----------
+           walls: rows of wall flags of cells, True for a wall
+           direction_masks: rows of direction masks of cells (bits of DIRECTION_BITS), built from walls if not given
+        """
+
+        wall = Wall()
+        cells = [[wall if is_wall else Path() for is_wall in row] for row in walls]
+
+        if not cells or not cells[0]:
+            raise ValueError("Board has no rows")
+
+        return cls(cells, direction_masks=direction_masks)
+
+    @classmethod
+    def __from_lines(cls, lines):
+        # walls hold no sprites, so all wall cells of a board share one object
+        wall = Wall()
+        class_factory = {" ": Path, "#": lambda: wall}
+        cells = []
+        width = None
 
-        for line in lines_split:
-            row = []
+        for line in lines:
             if len(line) == 0:
                 continue
-            for ch in line:
-                row.append(copy.deepcopy(class_factory[ch]()))
-            board.__cells.append(row)
 
-        return board
+            if width is None:
+                width = len(line)
+            elif len(line) != width:
+                raise ValueError(f"Board row {len(cells)} has length {len(line)}, expected {width}")
+
+            try:
+                cells.append([class_factory[ch]() for ch in line])
+            except KeyError:
+                ys, ch = next((ys, ch) for ys, ch in enumerate(line) if ch not in class_factory)
+                raise ValueError(f"Unknown board character {ch!r} at row {len(cells)}, column {ys}") from None
+
+        if not cells:
+            raise ValueError("Board has no rows")
+
+        return cls(cells)
 
     @property
     def cells(self):
@@ -76,11 +252,9 @@ class Board:
         return len(self.__cells)
 
     def at(self, i: int, j: int):
-        return self.__cells[i][j]
-
-    def directions(self, i: int, j: int) -> list:
         """
-        Returns list of possible directions from current cell.
+        Returns a cell of the board. With flyweight food, a cell holding food is returned as a new cell
+        with food sprites created on demand, removing them from the returned cell has no effect on the board.
 
         Parameters
         ----------
@@ -88,30 +262,119 @@ class Board:
            j: column coordinate
         """
 
-        possible_directions = []
+        cell = self.__cells[i][j]
+
+        if self.__food is not None:
+            n = self.__food[i * len(self.__cells[0]) + j]
+            if n:
+                return Path([Food("f", i, j) for _ in range(n)] + cell.my_sprites())
+
+        return cell
+
+    def __build_masks(self) -> list:
+        """
+        Returns lists of bit masks of possible directions from each cell, cells outside of the board count as walls.
+        Masks are built a row at a time from path flags of neighbouring rows.
+        """
 
-        if isinstance(self.__cells[i][j + 1], Path):
-            possible_directions.append(Direction.RIGHT)
-        if isinstance(self.__cells[i][j - 1], Path):
-            possible_directions.append(Direction.LEFT)
-        if isinstance(self.__cells[i + 1][j], Path):
-            possible_directions.append(Direction.UP)
-        if isinstance(self.__cells[i - 1][j], Path):
-            possible_directions.append(Direction.DOWN)
+        path = [[isinstance(cell, Path) for cell in row] for row in self.__cells]
+        bits = dict(DIRECTION_BITS)
+        right_bit, left_bit, up_bit, down_bit = (bits[d] for d in (Direction.RIGHT, Direction.LEFT, Direction.UP,
+                                                                    Direction.DOWN))
+        masks = []
 
-        return possible_directions
+        def neighbour_row(i: int, n: int) -> list:
+            if not 0 <= i < len(path):
+                return [False] * n
+            return path[i][:n] + [False] * (n - len(path[i]))
+
+        for xs, row in enumerate(path):
+            n = len(row)
+            right = row[1:] + [False]
+            left = [False] + row[:-1]
+            up = neighbour_row(xs + Direction.UP.value[0], n)
+            down = neighbour_row(xs + Direction.DOWN.value[0], n)
+
+            masks.append([r * right_bit | lf * left_bit | u * up_bit | d * down_bit
+                          for r, lf, u, d in zip(right, left, up, down)])
+
+        return masks
+
+    @property
+    def direction_mask(self):
+        return self.__masks
+
+    def directions(self, i: int, j: int) -> tuple:
+        """
+        Returns tuple of possible directions from current cell.
+        Cells outside of the board are treated as walls.
+
+        Parameters
+        ----------
+           i: row coordinate
+           j: column coordinate
+        """
+
+        return self.__directions[i][j]
 
     def insert_food(self):
 
         for xs in range(len(self.__cells)):
             for ys in range(len(self.__cells[0])):
                 if isinstance(self.__cells[xs][ys], Path):
-                    self.__cells[xs][ys].my_sprites().append(Food("f", xs, ys))
+                    if self.__food is not None:
+                        self.__food[xs * len(self.__cells[0]) + ys] += 1
+                        self.__food_count += 1
+                    else:
+                        self.insert(Food("f", xs, ys))
 
     def insert(self, sprite: Sprite):
+        if self.__food is not None and type(sprite) is Food:
+            self.__food[sprite.x * len(self.__cells[0]) + sprite.y] += 1
+            self.__food_count += 1
+            return
+
         self.__cells[sprite.x][sprite.y].my_sprites().append(sprite)
+        self.__track(sprite, sprite.x, sprite.y)
+
+    def remove(self, sprite: Sprite):
+        if self.__food is not None and type(sprite) is Food:
+            index = sprite.x * len(self.__cells[0]) + sprite.y
+            if self.__food[index] == 0:
+                raise ValueError(f"No food at row {sprite.x}, column {sprite.y}")
+            self.__food[index] -= 1
+            self.__food_count -= 1
+            return
+
+        self.__cells[sprite.x][sprite.y].my_sprites().remove(sprite)
+        self.__untrack(sprite, sprite.x, sprite.y)
+
+    def move(self, sprite: Sprite, xnew: int, ynew: int):
+        """
+        Moves sprite into new cell and sets its new coordinates.
+
+        Parameters
+        ----------
+           sprite: sprite to be moved
+           xnew: new row coordinate
+           ynew: new column coordinate
+        """
+
+        self.__cells[xnew][ynew].my_sprites().append(sprite)
+        self.__cells[sprite.x][sprite.y].my_sprites().remove(sprite)
+        self.__untrack(sprite, sprite.x, sprite.y)
+        self.__track(sprite, xnew, ynew)
 
-    def random_cell(self) -> tuple[int, int]:
+        sprite.x, sprite.y = xnew, ynew
+
+    def random_cell(self, rng: random.Random = random) -> tuple[int, int]:
+        """
+        Returns coordinates of random path cell.
+
+        Parameters
+        ----------
+           rng: random number generator, global random module if not given
+        """
 
         possible_sprite_indexes = []
 
@@ -120,16 +383,161 @@ class Board:
                 if isinstance(self.__cells[xs][ys], Path):
                     possible_sprite_indexes.append((xs, ys))
 
-        return random.choice(possible_sprite_indexes)
+        return rng.choice(possible_sprite_indexes)
 
     def count_by_type(self, sprite_type) -> int:
+        """
+        Returns number of sprites of sprite_type (or its subclasses) present on the board.
 
-        counter = 0
+        Parameters
+        ----------
+           sprite_type: sprite class
+        """
 
-        for xs in range(len(self.__cells)):
-            for ys in range(len(self.__cells[0])):
-                for si in self.__cells[xs][ys].my_sprites():
-                    if isinstance(si, sprite_type):
-                        counter += 1
+        counter = sum(n for sprite_class, n in self.__counts.items() if issubclass(sprite_class, sprite_type))
+
+        if self.__food is not None and issubclass(Food, sprite_type):
+            counter += self.__food_count
 
         return counter
+
+    def positions_by_type(self, sprite_type) -> set[tuple[int, int]]:
+        """
+        Returns coordinates of cells holding sprites of sprite_type (or its subclasses).
+
+        Parameters
+        ----------
+           sprite_type: sprite class
+        """
+
+        positions = set()
+
+        for sprite_class, counter in self.__positions.items():
+            if issubclass(sprite_class, sprite_type):
+                positions.update(counter)
+
+        if self.__food is not None and issubclass(Food, sprite_type):
+            width = len(self.__cells[0])
+            positions.update(divmod(index, width) for index in compress(range(len(self.__food)), self.__food))
+
+        return positions
+
+    @property
+    def distance_maps(self) -> DistanceMaps:
+        if self.__distances is None:
+            self.__distances = DistanceMaps(self)
+
+        return self.__distances
+
+    def distance_map(self, x: int, y: int, cells: list = None):
+        """
+        Returns number of moves from cell (x, y) to every cell, indexed by i * width + j, -1 if unreachable.
+        Maps are cached, as walls never change. If cells are given, only their distances are final.
+
+        Parameters
+        ----------
+           x: row coordinate
+           y: column coordinate
+           cells: flat indexes i * width + j of cells whose distances are needed, all cells if not given
+        """
+
+        return self.distance_maps.distance_map(x, y, cells)
+
+    def snapshot(self) -> BoardSnapshot:
+        return BoardSnapshot(bytes(self.__food_counts()), tuple((si, xs, ys) for xs, ys in self.__sprite_cells()
+                                                         for si in self.__cells[xs][ys].my_sprites()
+                                                         if type(si) is not Food))
+
+    def __food_counts(self) -> bytearray:
+        return self.__food if self.__food is not None else self.__food_objects
+
+    def __sprite_cells(self) -> set[tuple[int, int]]:
+        cells = set()
+
+        for sprite_class, positions in self.__positions.items():
+            if sprite_class is not Food:
+                cells.update(positions)
+
+        return cells
+
+    def restore(self, snapshot: BoardSnapshot):
+        """
+        Puts sprites back into cells they held when snapshot was taken. Food sprites are only
+        added or removed in cells where their number differs from the snapshot, other sprites
+        get their coordinates back.
+
+        Parameters
+        ----------
+           snapshot: snapshot taken from this board
+        """
+
+        width = self.width()
+        food = snapshot.food
+        if len(food) != width * self.height():
+            raise ValueError("Snapshot was taken from a board of different size")
+
+        for xs, ys in self.__sprite_cells():
+            sprites = self.__cells[xs][ys].my_sprites()
+            sprites[:] = [si for si in sprites if type(si) is Food]
+
+        for sprite_class, positions in self.__positions.items():
+            if sprite_class is not Food:
+                positions.clear()
+                self.__counts[sprite_class] = 0
+
+        current = self.__food_counts()
+        changed = _changed_cells(food, current)
+
+        if self.__food is not None:
+            for index in changed:
+                self.__food_count += food[index] - current[index]
+                current[index] = food[index]
+        else:
+            self.__restore_food_objects(food, changed)
+
+        for si, xs, ys in snapshot.sprites:
+            si.x, si.y = xs, ys
+            self.insert(si)
+
+    def __restore_food_objects(self, food: bytes, changed: list):
+        width = self.width()
+        current = self.__food_objects
+
+        for index in changed:
+            xs, ys = divmod(index, width)
+
+            for _ in range(food[index] - current[index]):
+                self.insert(Food("f", xs, ys))
+            for _ in range(current[index] - food[index]):
+                self.remove(next(si for si in self.__cells[xs][ys].my_sprites() if type(si) is Food))
+
+
+def _changed_cells(food: bytes, current: bytearray, block: int = 4096) -> list:
+    """
+    Returns indexes of cells where numbers of food sprites differ. Blocks of cells are compared
+    at C speed, cells are only visited in blocks that differ.
+
+    Parameters
+    ----------
+       food: number of food sprites in each cell
+       current: number of food sprites in each cell, of the same length
+       block: number of cells compared at once
+    """
+
+    changed = []
+
+    for start in range(0, len(food), block):
+        end = start + block
+        if food[start:end] != current[start:end]:
+            changed.extend(compress(range(start, min(end, len(food))), map(ne, food[start:end], current[start:end])))
+
+    return changed
+
+
+@dataclass
+class FlyweightBoard(Board):
+    """
+        A class to represent a board in Pacman game keeping food as number of food sprites per cell,
+        so that no Food object is held per cell. Food sprites seen through at() are created on demand.
+    """
+    flyweight_food: bool = True
@@ -0,0 +1,267 @@
+"""
+On-disk cache of parsed boards, keyed by a hash of the board string.
+
+An entry is a compressed .npz file with the walls and direction masks of a board and, for small boards,
+shortest path distances from every path cell, so that a cached board is built without parsing, validating
+or running breadth-first searches. Entries written by another CACHE_VERSION are rebuilt, and the least
+recently used entries are deleted once the cache holds more than max_entries of them. Layouts read by
+a process are also kept in memory, so that a worker playing many games on a board reads its file once.
+"""
+
+from array import array
+from dataclasses import dataclass
+import hashlib
+import io
+import os
+import zipfile
+import numpy as np
+from ArrayBoard import ArrayBoard
+from Board import Board
+from DistanceMaps import DistanceMaps
+from UserCache import cache_dir, write_atomic
+
+# version of the entry format, entries of other versions are rebuilt
+CACHE_VERSION = 1
+
+DEFAULT_MAX_ENTRIES = 64
+
+# distances from every path cell are stored for boards where they take at most this many cells
+MAX_DISTANCE_CELLS = 2 ** 21
+
+
+def maze_key(lines: str) -> str:
+    """
+    Returns hash of a board string, naming its cache entry.
+
+    Parameters
+    ----------
+       lines: string representing pacman game board
+    """
+
+    return hashlib.sha256(lines.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class BoardLayout:
+    """
+        A class to represent a parsed board layout with its derived indexes, shared by boards built from it.
+        ...
+        Attributes
+        ----------
+        walls : numpy.ndarray
+            boolean array, True for wall cells
+        direction_mask : numpy.ndarray
+            uint8 array, bit mask of possible directions from each cell (see DIRECTION_BITS)
+        distances : dict
+            distance maps in the format of distance_map(), keyed by source cell coordinates,
+            empty for boards too large to store them
+
+        Methods
+        -------
+        to_bytes():
+            Returns layout as a compressed .npz file.
+        from_bytes():
+            Returns layout read from a .npz file.
+    """
+    walls: np.ndarray
+    direction_mask: np.ndarray
+    distances: dict
+
+    def to_bytes(self, key: str) -> bytes:
+        sources = np.array([x * self.walls.shape[1] + y for x, y in self.distances], dtype=np.int64)
+        distances = np.array([np.frombuffer(d, dtype=np.intc) for d in self.distances.values()], dtype=np.int32)
+
+        f = io.BytesIO()
+        np.savez_compressed(f, version=np.array(CACHE_VERSION), key=np.array(key), shape=np.array(self.walls.shape),
+                            walls=np.packbits(self.walls), direction_mask=self.direction_mask, sources=sources,
+                            distances=distances.reshape(len(sources), self.walls.size))
+        return f.getvalue()
+
+    @staticmethod
+    def from_bytes(data, key: str):
+        """
+        Returns layout read from a .npz file, None if the file was written by another version
+        or for another board string.
+
+        Parameters
+        ----------
+           data: path or file object of .npz file
+           key: hash of the board string
+        """
+
+        with np.load(data) as entry:
+            if int(entry["version"]) != CACHE_VERSION or str(entry["key"]) != key:
+                return None
+
+            height, width = (int(n) for n in entry["shape"])
+            walls = np.unpackbits(entry["walls"], count=height * width).reshape(height, width).astype(bool)
+            distances = {}
+            for source, row in zip(entry["sources"], entry["distances"].astype(np.intc)):
+                distances[divmod(int(source), width)] = array("i", row.tobytes())
+
+            return BoardLayout(walls, entry["direction_mask"], distances)
+
+
+class BoardCache:
+    """
+        A class to load boards through an on-disk cache of parsed layouts.
+        ...
+        Attributes
+        ----------
+        _directory : str
+            directory of cache entries
+        _max_entries : int
+            maximal number of entries kept on disk
+        _layouts : dict
+            layouts read by this process, keyed by hash of board string
+
+        Methods
+        -------
+        directory():
+            Returns directory of cache entries.
+        layout():
+            Returns layout of a board string.
+        board():
+            Returns new empty board of a board string.
+        clear():
+            Removes all entries.
+    """
+
+    def __init__(self, directory: str = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Constructs necessary attributes for the cache.
+
+        Parameters
+        ----------
+            directory : str
+                directory of cache entries, boards in the user cache directory if not given
+            max_entries : int
+                maximal number of entries kept on disk
+        """
+        self._directory = directory if directory is not None else os.path.join(cache_dir(), "boards")
+        self._max_entries = max_entries
+        self._layouts = {}
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self._directory, key + ".npz")
+
+    def __read(self, key: str):
+        path = self.__path(key)
+
+        try:
+            layout = BoardLayout.from_bytes(path, key)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            # partly written or damaged entries are rebuilt
+            layout = None
+
+        if layout is None:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            return None
+
+        try:
+            # modification time orders entries for eviction
+            os.utime(path)
+        except OSError:
+            pass
+
+        return layout
+
+    def __write(self, key: str, layout: BoardLayout):
+        try:
+            write_atomic(self.__path(key), layout.to_bytes(key))
+            self.__evict()
+        except OSError:
+            # without a writable cache boards are parsed in every run
+            pass
+
+    def __evict(self):
+        entries = []
+        with os.scandir(self._directory) as it:
+            for entry in it:
+                if entry.name.endswith(".npz"):
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except FileNotFoundError:
+                        pass
+
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self._max_entries)]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def __build(lines: str) -> BoardLayout:
+        board = ArrayBoard.board_from_str(lines)
+        walls = board.walls
+
+        distances = {}
+        path_cells = np.argwhere(~walls)
+        if len(path_cells) * walls.size <= MAX_DISTANCE_CELLS:
+            maps = DistanceMaps(board, max_maps=len(path_cells))
+            distances = {(int(x), int(y)): maps.distance_map(int(x), int(y)) for x, y in path_cells}
+
+        return BoardLayout(walls, board.direction_mask, distances)
+
+    def layout(self, lines: str) -> BoardLayout:
+        """
+        Returns layout of a board string, read from memory or from the cache, or parsed and cached.
+
+        Parameters
+        ----------
+           lines: string representing pacman game board
+        """
+
+        key = maze_key(lines)
+        layout = self._layouts.get(key)
+
+        if layout is None:
+            layout = self.__read(key)
+            if layout is None:
+                layout = self.__build(lines)
+                self.__write(key, layout)
+            self._layouts[key] = layout
+
+        return layout
+
+    def board(self, lines: str, board_class=Board):
+        """
+        Returns new empty board of a board string, with distance maps of the cached layout.
+
+        Parameters
+        ----------
+           lines: string representing pacman game board
+           board_class: board implementation, Board, FlyweightBoard or ArrayBoard
+        """
+
+        layout = self.layout(lines)
+
+        if issubclass(board_class, ArrayBoard):
+            board = board_class(layout.walls, direction_mask=layout.direction_mask)
+        else:
+            board = board_class.board_from_walls(layout.walls.tolist(), layout.direction_mask.tolist())
+
+        board.distance_maps.update(layout.distances)
+
+        return board
+
+    def clear(self):
+        self._layouts.clear()
+
+        try:
+            with os.scandir(self._directory) as it:
+                for entry in it:
+                    if entry.name.endswith(".npz"):
+                        os.unlink(entry.path)
+        except FileNotFoundError:
+            pass
@@ -18,6 +18,8 @@ class Cell(ABC):
         set_mysprites():
             Abstract method for updating a list of sprites in a cell.
     """
+    __slots__ = ("_mysprites",)
+
     def __init__(self, sprites: list = None):
         """
         Constructs necessary attributes for the cell object.
@@ -52,6 +54,8 @@ class Wall(Cell):
         set_mysprites():
             Sets an empty list of sprites for a wall cell.
     """
+    __slots__ = ()
+
     def __init__(self, sprites: list = None):
         super().__init__(sprites)
 
@@ -74,6 +78,8 @@ class Path(Cell):
         set_mysprites():
             Adds a sprite to a path cell.
     """
+    __slots__ = ()
+
     def __init__(self, sprites: list = None):
         super().__init__(sprites)
 
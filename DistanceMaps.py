@@ -0,0 +1,199 @@
+from array import array
+from collections import OrderedDict, deque
+
+try:
+    import numpy as np
+except ImportError:  # boards are searched cell by cell
+    np = None
+
+# total number of cells held in distance maps of one board
+DISTANCE_CACHE_CELLS = 2 ** 24
+
+# boards with at least this many cells are searched with NumPy, a level of cells at a time
+VECTORIZED_SEARCH_CELLS = 4096
+
+
+class DistanceMaps:
+    """
+        A class to compute and cache shortest path distances on a board.
+        Walls never change, so a distance map from a cell stays valid for the whole game.
+        Maps are computed with breadth-first search on demand and the least recently used ones
+        are evicted once the cache holds DISTANCE_CACHE_CELLS cells.
+
+        On large boards the search advances a whole level of cells at a time with NumPy, over bit masks
+        of possible directions, and stops as soon as the cells asked for have a distance. The frontier of
+        such a partial map is kept, so that later requests resume the search instead of starting over.
+        ...
+        Attributes
+        ----------
+        _board : Board
+            board the distances are measured on, Board or ArrayBoard
+        _maps : OrderedDict
+            cached distance maps, keyed by source cell coordinates
+        _max_maps : int
+            maximal number of cached maps
+        _frontiers : dict
+            (cells at the last distance reached, that distance) of partial maps, keyed by source cell coordinates
+        _masks : numpy.ndarray
+            bit mask of possible directions from each cell (see DIRECTION_BITS), indexed by i * width + j,
+            copied from the board's direction_mask on the first vectorized search
+        _steps : list
+            (direction bit, flat index offset) of each direction
+
+        Methods
+        -------
+        distance_map():
+            Returns distances from a cell to cells of the board.
+        update():
+            Adds precomputed distance maps.
+        clear():
+            Removes all cached maps.
+    """
+
+    def __init__(self, board, max_maps: int = None):
+        """
+        Constructs necessary attributes for the cache.
+
+        Parameters
+        ----------
+            board : Board
+                board the distances are measured on
+            max_maps : int
+                maximal number of cached maps, fits DISTANCE_CACHE_CELLS cells if not given
+        """
+        if max_maps is None:
+            max_maps = max(1, DISTANCE_CACHE_CELLS // (board.width() * board.height()))
+
+        self._board = board
+        self._maps = OrderedDict()
+        self._max_maps = max_maps
+        self._frontiers = {}
+        self._masks = None
+        self._steps = None
+
+    def distance_map(self, x: int, y: int, cells: list = None):
+        """
+        Returns number of moves from cell (x, y) to every cell, indexed by i * width + j, -1 if unreachable.
+        If cells are given, the map may be partial: only distances of the given cells are final,
+        other cells not reached yet are -1. The returned map is cached and must not be modified.
+
+        Parameters
+        ----------
+           x: row coordinate of source cell
+           y: column coordinate of source cell
+           cells: flat indexes i * width + j of cells whose distances are needed, all cells if not given
+        """
+
+        key = (x, y)
+        distances = self._maps.get(key)
+
+        if distances is not None:
+            self._maps.move_to_end(key)
+        else:
+            distances = self.__new_map(x, y)
+            self._maps[key] = distances
+
+            if len(self._maps) > self._max_maps:
+                self._frontiers.pop(self._maps.popitem(last=False)[0], None)
+
+        if key in self._frontiers:
+            self.__extend(key, distances, cells)
+
+        return distances
+
+    def update(self, maps: dict):
+        """
+        Adds precomputed distance maps, e.g. loaded from BoardCache, evicting least recently used maps
+        beyond the limit. Maps are kept, not copied, and must not be modified.
+
+        Parameters
+        ----------
+           maps: distance maps in the format of distance_map(), keyed by source cell coordinates
+        """
+
+        self._maps.update(maps)
+        for key in maps:
+            self._frontiers.pop(key, None)
+
+        while len(self._maps) > self._max_maps:
+            self._frontiers.pop(self._maps.popitem(last=False)[0], None)
+
+    def clear(self):
+        self._maps.clear()
+        self._frontiers.clear()
+
+    def __new_map(self, x: int, y: int):
+        board = self._board
+        width = board.width()
+
+        if np is None or width * board.height() < VECTORIZED_SEARCH_CELLS:
+            return self._search(x, y)
+
+        if self._masks is None:
+            self.__build_masks()
+
+        distances = np.full(width * board.height(), -1, dtype=np.intc)
+        distances[x * width + y] = 0
+        self._frontiers[(x, y)] = (np.array([x * width + y], dtype=np.int64), 0)
+
+        return distances
+
+    def __build_masks(self):
+        from Board import DIRECTION_BITS  # Board imports this module
+
+        width = self._board.width()
+
+        # an array of ArrayBoard, lists of rows of Board
+        self._masks = np.asarray(self._board.direction_mask, dtype=np.uint8).ravel()
+        self._steps = [(bit, d.value[0] * width + d.value[1]) for d, bit in DIRECTION_BITS]
+
+    def __extend(self, key: tuple, distances, cells: list):
+        """
+        Advances the search of a partial map until given cells are reached or no cell is left to visit.
+
+        Parameters
+        ----------
+           key: source cell coordinates
+           distances: partial distance map, updated in place
+           cells: flat indexes of cells whose distances are needed, all cells if None
+        """
+
+        frontier, distance = self._frontiers[key]
+        masks = self._masks
+        needed = None if cells is None else np.asarray(cells, dtype=np.int64)
+
+        while len(frontier) and (needed is None or (distances[needed] < 0).any()):
+            distance += 1
+            reached = []
+
+            for bit, offset in self._steps:
+                cells_next = frontier[masks[frontier] & bit != 0] + offset
+                cells_next = cells_next[distances[cells_next] < 0]
+                distances[cells_next] = distance
+                reached.append(cells_next)
+
+            frontier = np.concatenate(reached)
+
+        if len(frontier):
+            self._frontiers[key] = (frontier, distance)
+        else:
+            del self._frontiers[key]
+
+    def _search(self, x: int, y: int) -> array:
+        board = self._board
+        width = board.width()
+        distances = array("i", [-1]) * (width * board.height())
+        distances[x * width + y] = 0
+        queue = deque([(x, y)])
+
+        while queue:
+            i, j = queue.popleft()
+            next_distance = distances[i * width + j] + 1
+
+            for d in board.directions(i, j):
+                ni, nj = i + d.value[0], j + d.value[1]
+                if distances[ni * width + nj] < 0:
+                    distances[ni * width + nj] = next_distance
+                    queue.append((ni, nj))
+
+        return distances
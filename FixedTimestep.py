@@ -0,0 +1,74 @@
+class FixedTimestep:
+    """
+        A class to advance game logic at a fixed tick rate independent of the frame rate.
+        Real time elapsed between frames is accumulated and spent in whole ticks. The remaining
+        fraction of a tick is used to interpolate sprite positions between cells when drawing.
+        After a stall the game catches up by running a few ticks per frame, time beyond max_backlog is dropped.
+        ...
+        Attributes
+        ----------
+        _tick_time : float
+            duration of one tick in seconds
+        _max_ticks_per_frame : int
+            maximal number of ticks run in one frame
+        _max_backlog : float
+            maximal accumulated time in seconds, older time is dropped
+        _accumulated : float
+            time in seconds not yet spent in ticks
+
+        Methods
+        -------
+        tick_time():
+            Returns duration of one tick in seconds.
+        alpha():
+            Returns fraction of the next tick already elapsed.
+        advance():
+            Adds elapsed time and returns number of ticks to run.
+        reset():
+            Drops accumulated time.
+    """
+
+    def __init__(self, tick_rate: float, max_ticks_per_frame: int = 5, max_backlog: float = 1.0):
+        """
+        Constructs necessary attributes for the scheduler object.
+
+        Parameters
+        ----------
+            tick_rate : float
+                number of ticks per second
+            max_ticks_per_frame : int
+                maximal number of ticks run in one frame
+            max_backlog : float
+                maximal accumulated time in seconds
+        """
+        self._tick_time = 1.0 / tick_rate
+        self._max_ticks_per_frame = max_ticks_per_frame
+        self._max_backlog = max_backlog
+        self._accumulated = 0.0
+
+    @property
+    def tick_time(self):
+        return self._tick_time
+
+    @property
+    def alpha(self) -> float:
+        return min(self._accumulated / self._tick_time, 1.0)
+
+    def advance(self, elapsed: float) -> int:
+        """
+        Adds time elapsed since the last frame and returns number of ticks to run in this frame.
+
+        Parameters
+        ----------
+           elapsed: time elapsed since the last frame in seconds
+        """
+
+        self._accumulated = min(self._accumulated + elapsed, self._max_backlog)
+
+        ticks = min(int(self._accumulated // self._tick_time), self._max_ticks_per_frame)
+        self._accumulated -= ticks * self._tick_time
+
+        return ticks
+
+    def reset(self):
+        self._accumulated = 0.0
@@ -0,0 +1,503 @@
+from dataclasses import dataclass
+from enum import Enum
+import random
+import time
+from Board import Board, BoardSnapshot
+from Sprite import Food, Ghost, PacMan, TravelingSprite, collision_solver
+from SpriteMove import Direction, ManualWalk, PersistentWalk, RandomWalk, SpriteMove
+
+
+class GameStatus(Enum):
+    """
+    Class representing state of a game.
+    """
+    RUNNING = "running"
+    WON = "won"
+    LOST = "lost"
+
+
+@dataclass
+class GameResult:
+    """
+        A class to represent the outcome of a game.
+        ...
+        Attributes
+        ----------
+        points : int
+            points earned by PacMan
+        lives : int
+            PacMan lives remaining
+        ticks : int
+            number of ticks simulated
+        status : GameStatus
+            state of the game when the result was taken
+        seed : int
+            seed of the game, None if the game was not seeded
+    """
+    points: int
+    lives: int
+    ticks: int
+    status: GameStatus
+    seed: int = None
+
+    @property
+    def won(self) -> bool:
+        return self.status is GameStatus.WON
+
+    @property
+    def lost(self) -> bool:
+        return self.status is GameStatus.LOST
+
+
+@dataclass(frozen=True)
+class GameSnapshot:
+    """
+        A class to represent state of a game at some moment, restored into the engine it was taken from.
+        ...
+        Attributes
+        ----------
+        board : BoardSnapshot
+            sprites present on the board
+        sprites : tuple
+            coordinates and state of each moving sprite, in order of engine sprites
+        ticks : int
+            number of ticks simulated
+        status : GameStatus
+            state of the game
+    """
+    board: BoardSnapshot
+    sprites: tuple
+    ticks: int
+    status: GameStatus
+
+
+# moving strategies of the standard set of ghosts
+DEFAULT_GHOST_STRATEGIES = (RandomWalk, RandomWalk, PersistentWalk, PersistentWalk)
+
+
+def new_seed() -> int:
+    return random.SystemRandom().randrange(2 ** 32)
+
+
+def default_sprites(board: Board, pacman_strategy: SpriteMove = None,
+                    ghost_strategies: tuple = DEFAULT_GHOST_STRATEGIES, rng: random.Random = None) -> list:
+    """
+    Returns sprites placed on random path cells: ghosts followed by PacMan.
+    Every strategy gets its own random number generator seeded from rng.
+
+    Parameters
+    ----------
+       board: game board
+       pacman_strategy: moving strategy of PacMan, ManualWalk if not given
+       ghost_strategies: moving strategy class of each ghost, four ghosts by default
+       rng: random number generator of the game, global random module if not given
+    """
+
+    if pacman_strategy is None:
+        pacman_strategy = ManualWalk()
+
+    if rng is None:
+        rng = random
+
+    sprites = [Ghost("g" + str(n), *board.random_cell(rng), strategy(random.Random(rng.getrandbits(64))))
+               for n, strategy in enumerate(ghost_strategies, start=1)]
+
+    pacman_strategy.rng = random.Random(rng.getrandbits(64))
+    sprites.append(PacMan("pc", *board.random_cell(rng), pacman_strategy))
+
+    return sprites
+
+
+class GameEngine:
+    """
+        A class to run Pacman game logic without any user interface.
+        ...
+        Attributes
+        ----------
+        _board : Board
+            game board
+        _sprites : list
+            list of moving sprites, moved in list order every tick
+        _ticks : int
+            number of ticks simulated
+        _status : GameStatus
+            current state of the game
+        _seed : int
+            seed of the game, None if the game was not seeded
+        _profiler : TickProfiler
+            profiler timing phases of ticks, None if profiling is disabled
+        _two_phase : bool
+            if True, ticks collect targets of all sprites first and then move them at once, see resolve()
+        _removed : set
+            indexes of sprites removed from the board, kept in two-phase ticks
+
+        Methods
+        -------
+        new_game():
+            Returns engine for a new game on a board read from string.
+        from_board():
+            Returns engine for a new game on a board.
+        board():
+            Returns game board.
+        sprites():
+            Returns list of moving sprites.
+        pacman():
+            Returns PacMan sprite.
+        ticks():
+            Returns number of ticks simulated.
+        seed():
+            Returns seed of the game.
+        status():
+            Returns current state of the game.
+        profiler():
+            Returns profiler timing phases of ticks.
+        two_phase():
+            Returns True if ticks run in two phases.
+        step():
+            Advances the game by one tick.
+        targets():
+            Returns cells sprites want to move into in this tick.
+        resolve():
+            Moves all sprites at once and solves their collisions.
+        run():
+            Advances the game until it ends or tick limit is reached.
+        result():
+            Returns result record of the game.
+        snapshot():
+            Returns state of the game.
+        restore():
+            Sets state of the game taken by snapshot().
+    """
+
+    def __init__(self, board: Board, sprites: list[TravelingSprite], seed: int = None, two_phase: bool = False):
+        """
+        Constructs necessary attributes for the engine object and inserts sprites into the board.
+
+        Parameters
+        ----------
+            board : Board
+                game board, already filled with food
+            sprites : list
+                moving sprites, not yet inserted into the board
+            seed : int
+                seed the board and sprites were set up with, recorded in results
+            two_phase : bool
+                if True, sprites move at once, otherwise one after another in list order
+        """
+        self._board = board
+        self._sprites = sprites
+        self._seed = seed
+        self._ticks = 0
+        self._status = GameStatus.RUNNING
+        self._profiler = None
+        self._two_phase = two_phase
+        self._removed = set()
+        self._pacman = next(si for si in sprites if isinstance(si, PacMan))
+
+        for si in sprites:
+            board.insert(si)
+
+    @staticmethod
+    def new_game(lines: str, pacman_strategy: SpriteMove = None, board_class=Board,
+                 ghost_strategies: tuple = DEFAULT_GHOST_STRATEGIES, seed: int = None, two_phase: bool = False):
+        """
+        Returns engine for a new game with food, ghosts and PacMan.
+        All random draws of the game come from generators seeded with seed, so the game can be replayed.
+
+        Parameters
+        ----------
+           lines: string representing pacman game board
+           pacman_strategy: moving strategy of PacMan, ManualWalk if not given
+           board_class: board implementation, Board or ArrayBoard
+           ghost_strategies: moving strategy class of each ghost
+           seed: seed of the game, drawn from system randomness if not given
+           two_phase: if True, sprites move at once, otherwise one after another
+        """
+
+        return GameEngine.from_board(board_class.board_from_str(lines), pacman_strategy, ghost_strategies, seed,
+                                     two_phase)
+
+    @staticmethod
+    def from_board(board, pacman_strategy: SpriteMove = None, ghost_strategies: tuple = DEFAULT_GHOST_STRATEGIES,
+                   seed: int = None, two_phase: bool = False):
+        """
+        Returns engine for a new game on an empty board, e.g. loaded with board_from_file(),
+        filling it with food, ghosts and PacMan.
+
+        Parameters
+        ----------
+           board: board without sprites
+           pacman_strategy: moving strategy of PacMan, ManualWalk if not given
+           ghost_strategies: moving strategy class of each ghost
+           seed: seed of the game, drawn from system randomness if not given
+           two_phase: if True, sprites move at once, otherwise one after another
+        """
+
+        if seed is None:
+            seed = new_seed()
+
+        board.insert_food()
+
+        sprites = default_sprites(board, pacman_strategy, ghost_strategies, random.Random(seed))
+
+        return GameEngine(board, sprites, seed, two_phase)
+
+    @property
+    def board(self):
+        return self._board
+
+    @property
+    def sprites(self):
+        return self._sprites
+
+    @property
+    def pacman(self):
+        return self._pacman
+
+    @property
+    def ticks(self):
+        return self._ticks
+
+    @property
+    def status(self):
+        return self._status
+
+    @property
+    def seed(self):
+        return self._seed
+
+    @property
+    def profiler(self):
+        return self._profiler
+
+    @profiler.setter
+    def profiler(self, profiler):
+        self._profiler = profiler
+
+    @property
+    def two_phase(self):
+        return self._two_phase
+
+    def step(self, actions: dict[str, Direction] = None) -> GameStatus:
+        """
+        Advances the game by one tick and returns state of the game.
+
+        Parameters
+        ----------
+           actions: directions for manually controlled sprites, keyed by sprite name
+        """
+
+        if self._status is not GameStatus.RUNNING:
+            return self._status
+
+        if actions:
+            for si in self._sprites:
+                if si.name in actions and isinstance(si.move_strategy, ManualWalk):
+                    si.move_strategy.direction = actions[si.name]
+
+        self._ticks += 1
+
+        if self._two_phase:
+            if self._profiler is None:
+                return self.resolve(self.targets())
+
+            start = time.perf_counter()
+            targets = self.targets()
+            self._profiler.record("targets", time.perf_counter() - start)
+            with self._profiler.phase("resolve"):
+                return self.resolve(targets)
+
+        if self._profiler is not None:
+            return self.__profiled_tick()
+
+        for si in self._sprites:
+            si.mover(self._board)
+
+            # check if pacman is on the board
+            if self._board.count_by_type(PacMan) == 0:
+                self._status = GameStatus.LOST
+                return self._status
+
+        # check number of food on the board
+        if self._board.count_by_type(Food) == 0:
+            self._status = GameStatus.WON
+
+        return self._status
+
+    def __profiled_tick(self) -> GameStatus:
+        """
+        Moves sprites like step(), recording time of each sprite's move, of collision solving
+        and of game end checks in the profiler.
+        """
+
+        board = self._board
+        profiler = self._profiler
+        collisions = checks = 0.0
+
+        for si in self._sprites:
+            start = time.perf_counter()
+            xnew, ynew = si.target(board)
+            moved = time.perf_counter()
+            si.move_to(board, xnew, ynew)
+            solved = time.perf_counter()
+            lost = board.count_by_type(PacMan) == 0
+            checked = time.perf_counter()
+
+            profiler.record("move " + si.name, moved - start)
+            collisions += solved - moved
+            checks += checked - solved
+
+            if lost:
+                self._status = GameStatus.LOST
+                break
+        else:
+            start = time.perf_counter()
+            if board.count_by_type(Food) == 0:
+                self._status = GameStatus.WON
+            checks += time.perf_counter() - start
+
+        profiler.record("collisions", collisions)
+        profiler.record("checks", checks)
+
+        return self._status
+
+    def targets(self) -> list:
+        """
+        Returns cell each sprite wants to move into, chosen by its moving strategy from the current state
+        of the board, None for sprites removed from the board. Sprites are not moved, so targets can be
+        computed in any order or in bulk.
+        """
+
+        board = self._board
+        removed = self._removed
+
+        return [None if n in removed else si.target(board) for n, si in enumerate(self._sprites)]
+
+    def __on_board(self, sprite) -> bool:
+        return any(si is sprite for si in self._board.at(sprite.x, sprite.y).my_sprites())
+
+    def resolve(self, targets: list) -> GameStatus:
+        """
+        Moves all sprites into their target cells at once and returns state of the game.
+
+        Two sprites meet if at least one of them moves and they end up in the same cell or swap cells.
+        One solver is called for each meeting: the moving sprite's one if only one of them moves,
+        otherwise the first one registered, trying the sprite earlier in the list as the moving one first.
+        Then sprites that move solve collisions with other sprites (food) in their target cells.
+        Sprites stopped or removed by a collision stay out of their target cells.
+
+        Parameters
+        ----------
+           targets: target cell of each sprite, None for sprites that do not move, as returned by targets()
+        """
+
+        board = self._board
+        sprites = self._sprites
+        removed = self._removed
+        positions = [(si.x, si.y) for si in sprites]
+        moving = [n for n, t in enumerate(targets) if t is not None and n not in removed]
+        moved = {n for n in moving if targets[n] != positions[n]}
+        stopped = set()
+
+        by_target = {}
+        for n in moving:
+            by_target.setdefault(targets[n], []).append(n)
+
+        # meetings of moving sprites, each pair once
+        for n in moving:
+            met = [m for m in by_target[targets[n]] if m > n]
+            if n in moved:
+                met.extend(m for m in by_target.get(positions[n], ()) if m > n and positions[m] == targets[n])
+
+            for m in met:
+                if (n not in moved and m not in moved) or n in removed or m in removed:
+                    continue
+
+                first, second = (m, n) if n not in moved else (n, m)
+                solver = collision_solver(type(sprites[first]), type(sprites[second]))
+                if solver is None and n in moved and m in moved:
+                    first, second = second, first
+                    solver = collision_solver(type(sprites[first]), type(sprites[second]))
+                if solver is None:
+                    continue
+
+                if solver(board, sprites[first], sprites[second]):
+                    stopped.add(first)
+                for k in (first, second):
+                    if not self.__on_board(sprites[k]):
+                        removed.add(k)
+
+        # collisions with sprites that do not take part in the tick
+        movers = set(sprites)
+        for n in moving:
+            if n not in moved or n in stopped or n in removed:
+                continue
+
+            sprite = sprites[n]
+            sprite_class = type(sprite)
+            solved = False
+            for si in reversed(board.at(*targets[n]).my_sprites()):
+                if si in movers:
+                    continue
+
+                solver = collision_solver(sprite_class, type(si))
+                if solver is not None:
+                    solved = True
+                    if solver(board, sprite, si):
+                        stopped.add(n)
+
+            if solved and not self.__on_board(sprite):
+                removed.add(n)
+
+        for n in moving:
+            if n in moved and n not in stopped and n not in removed:
+                board.move(sprites[n], *targets[n])
+
+        if board.count_by_type(PacMan) == 0:
+            self._status = GameStatus.LOST
+        elif board.count_by_type(Food) == 0:
+            self._status = GameStatus.WON
+
+        return self._status
+
+    def run(self, max_ticks: int) -> GameResult:
+        """
+        Advances the game until it ends or max_ticks ticks have been simulated, returns result record.
+
+        Parameters
+        ----------
+           max_ticks: maximal number of ticks to simulate
+        """
+
+        while self._status is GameStatus.RUNNING and self._ticks < max_ticks:
+            self.step()
+
+        return self.result()
+
+    def result(self) -> GameResult:
+        return GameResult(self._pacman.points, self._pacman.lives, self._ticks, self._status, self._seed)
+
+    def snapshot(self) -> GameSnapshot:
+        return GameSnapshot(self._board.snapshot(), tuple(si.snapshot() for si in self._sprites), self._ticks,
+                            self._status)
+
+    def restore(self, snapshot: GameSnapshot):
+        """
+        Sets the game back to the moment snapshot was taken. Much faster than copying the engine,
+        so a game can be rewound many times, e.g. by tree search or replay seeking.
+
+        Parameters
+        ----------
+           snapshot: snapshot taken from this engine
+        """
+
+        self._board.restore(snapshot.board)
+
+        for si, state in zip(self._sprites, snapshot.sprites):
+            si.restore(state)
+
+        on_board = {si for si, xs, ys in snapshot.board.sprites}
+        self._removed = {n for n, si in enumerate(self._sprites) if si not in on_board}
+
+        self._ticks = snapshot.ticks
+        self._status = snapshot.status
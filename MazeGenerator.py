@@ -0,0 +1,130 @@
+"""
+Generates random PacMan boards of any size, for scale tests.
+
+Path cells lie on odd rows and columns, joined by a random spanning tree carved with iterative
+depth-first search, so every path cell is reachable. Some of the remaining walls between neighbouring
+path cells are then removed to add loops. Time and memory are linear in the number of cells.
+
+Usage: python MazeGenerator.py height width [--density 0.3] [--seed 1] > maze.txt
+"""
+
+import argparse
+import random
+import sys
+from Board import Board
+
+WALL = ord("#")
+PATH = ord(" ")
+
+
+def generate_maze(height: int, width: int, density: float = 0.3, seed: int = None) -> str:
+    """
+    Returns string representing wall-enclosed board with all path cells connected.
+    With an even number of rows or columns, the last inner row or column is wall.
+
+    Parameters
+    ----------
+       height: number of rows, at least 3
+       width: number of columns, at least 3
+       density: fraction of walls between neighbouring corridors removed after carving,
+                0 gives a maze without loops, 1 a grid of wall pillars
+       seed: seed of random number generator, drawn from system randomness if not given
+    """
+
+    if height < 3 or width < 3:
+        raise ValueError(f"Board has to be at least 3x3, got {height}x{width}")
+    if not 0 <= density <= 1:
+        raise ValueError(f"Density has to be between 0 and 1, got {density}")
+
+    rng = random.Random(seed)
+
+    # rows end with a newline, so that the grid decodes into the board string
+    stride = width + 1
+    grid = bytearray((b"#" * width + b"\n") * height)
+
+    # 1 for path cells not yet carved, every other cell is 0
+    unvisited = bytearray(len(grid))
+    for i in range(1, height - 1, 2):
+        unvisited[i * stride + 1:i * stride + width - 1:2] = b"\x01" * len(range(1, width - 1, 2))
+
+    offsets = (2, -2, 2 * stride, -2 * stride)
+    size = len(grid)
+
+    start = stride + 1
+    grid[start] = PATH
+    unvisited[start] = 0
+    stack = [start]
+
+    while stack:
+        current = stack[-1]
+        neighbours = [current + o for o in offsets if 0 <= current + o < size and unvisited[current + o]]
+
+        if not neighbours:
+            stack.pop()
+            continue
+
+        nxt = neighbours[0] if len(neighbours) == 1 else rng.choice(neighbours)
+        unvisited[nxt] = 0
+        grid[nxt] = PATH
+        grid[(current + nxt) // 2] = PATH
+        stack.append(nxt)
+
+    if density > 0:
+        _add_loops(grid, height, width, density, rng)
+
+    return grid[:-1].decode("ascii")
+
+
+def _add_loops(grid: bytearray, height: int, width: int, density: float, rng: random.Random):
+    stride = width + 1
+    rand = rng.random
+
+    # walls between horizontally neighbouring path cells
+    for i in range(1, height - 1, 2):
+        row = i * stride
+        for index in range(row + 2, row + width - 2, 2):
+            if grid[index] == WALL and rand() < density:
+                grid[index] = PATH
+
+    # walls between vertically neighbouring path cells
+    for i in range(2, height - 2, 2):
+        row = i * stride
+        for index in range(row + 1, row + width - 1, 2):
+            if grid[index] == WALL and rand() < density:
+                grid[index] = PATH
+
+
+def generate_board(height: int, width: int, density: float = 0.3, seed: int = None, board_class=Board):
+    """
+    Returns random board, see generate_maze().
+
+    Parameters
+    ----------
+       height: number of rows, at least 3
+       width: number of columns, at least 3
+       density: fraction of walls between neighbouring corridors removed after carving
+       seed: seed of random number generator, drawn from system randomness if not given
+       board_class: board implementation, Board, FlyweightBoard or ArrayBoard
+    """
+
+    return board_class.board_from_str(generate_maze(height, width, density, seed))
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Generate a random PacMan board.")
+    parser.add_argument("height", type=int, help="number of rows")
+    parser.add_argument("width", type=int, help="number of columns")
+    parser.add_argument("--density", type=float, default=0.3, help="fraction of inner walls removed to add loops")
+    parser.add_argument("--seed", type=int, default=None, help="seed of random number generator")
+    args = parser.parse_args(argv)
+
+    try:
+        maze = generate_maze(args.height, args.width, args.density, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+
+    sys.stdout.write(maze + "\n")
+
+
+if __name__ == "__main__":
+    main()
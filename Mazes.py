@@ -0,0 +1,17 @@
+"""
+Built-in PacMan game boards.
+"""
+
+board_drawn = """
+#################################
+#      ####                     #
+# #### #### #### #### #### #### #
+#                               #
+# #### #### #### #### #### #### #
+#                               #
+# #### #### #### #### #### #### #
+#                               #
+# ######### #### #### #### ######
+#                          ######
+#################################
+"""
@@ -0,0 +1,326 @@
+"""
+Reinforcement learning environments for PacMan, with the reset() and step() interface of Gym.
+
+An observation is a (channels, height, width) uint8 array with channels WALLS, FOOD, GHOSTS and PACMAN,
+1 where the cell holds a wall, food, a ghost or PacMan. The array is allocated once per environment
+and updated in place: every step only rewrites the cells sprites have left or entered, so callers
+that keep an observation across steps have to copy it.
+
+An action is a code of PacMan direction, index into ACTIONS, the same codes as replay inputs.
+The reward of a step is the food eaten minus life_penalty for every life PacMan lost.
+"""
+
+import numpy as np
+from BatchEngine import BatchEngine, RUNNING
+from Board import Board, DIRECTION_BITS
+from ArrayBoard import ArrayBoard
+from Cell import Wall
+from GameEngine import DEFAULT_GHOST_STRATEGIES, GameEngine, GameStatus
+from Replay import DIRECTIONS
+from Sprite import Food
+from SpriteMove import ManualWalk, StartingDirection
+
+# observation channels
+WALLS, FOOD, GHOSTS, PACMAN = range(4)
+N_CHANNELS = 4
+
+# PacMan direction of each action, stopping first
+ACTIONS = tuple(DIRECTIONS[code] for code in range(len(DIRECTIONS)))
+
+# direction index (in DIRECTION_BITS) of each action, -1 to stop, as taken by BatchEngine.step
+ACTION_DIRECTIONS = np.array([-1 if d is StartingDirection.START else [d for d, bit in DIRECTION_BITS].index(d)
+                              for d in ACTIONS], dtype=np.int64)
+
+
+class PacManEnv:
+    """
+        A class to represent a single PacMan game as a reinforcement learning environment,
+        PacMan is controlled through ManualWalk.direction.
+        The board is read once and emptied with restore() to start every game.
+        ...
+        Attributes
+        ----------
+        _board : Board
+            game board, any board implementation
+        _empty : BoardSnapshot
+            state of the board without sprites
+        _ghost_strategies : tuple
+            moving strategy class of each ghost
+        _max_ticks : int
+            number of ticks after which a game is truncated
+        _life_penalty : float
+            reward lost with every PacMan life
+        _two_phase : bool
+            if True, sprites move at once, otherwise one after another
+        _move : ManualWalk
+            moving strategy of PacMan
+        _engine : GameEngine
+            engine of the current game, None before the first reset
+        _obs : numpy.ndarray
+            (channels, height, width) observation, updated in place
+
+        Methods
+        -------
+        observation():
+            Returns observation array of the environment.
+        engine():
+            Returns engine of the current game.
+        reset():
+            Starts a new game and returns its first observation.
+        step():
+            Advances the game by one tick with a PacMan action.
+    """
+
+    def __init__(self, lines: str, board_class=Board, ghost_strategies: tuple = DEFAULT_GHOST_STRATEGIES,
+                 max_ticks: int = 10000, life_penalty: float = 10.0, two_phase: bool = False):
+        """
+        Constructs necessary attributes for the environment.
+
+        Parameters
+        ----------
+            lines : str
+                string representing pacman game board
+            board_class : type
+                board implementation, Board, FlyweightBoard or ArrayBoard
+            ghost_strategies : tuple
+                moving strategy class of each ghost
+            max_ticks : int
+                number of ticks after which a game is truncated
+            life_penalty : float
+                reward lost with every PacMan life
+            two_phase : bool
+                if True, sprites move at once, otherwise one after another
+        """
+        self._board = board_class.board_from_str(lines)
+        self._empty = self._board.snapshot()
+        self._ghost_strategies = tuple(ghost_strategies)
+        self._max_ticks = max_ticks
+        self._life_penalty = life_penalty
+        self._two_phase = two_phase
+        self._move = ManualWalk()
+        self._engine = None
+
+        self._obs = np.zeros((N_CHANNELS, self._board.height(), self._board.width()), dtype=np.uint8)
+        for i in range(self._board.height()):
+            for j in range(self._board.width()):
+                self._obs[WALLS, i, j] = isinstance(self._board.at(i, j), Wall)
+
+    @property
+    def observation(self):
+        return self._obs
+
+    @property
+    def engine(self):
+        return self._engine
+
+    def __food_at(self, x: int, y: int) -> int:
+        return sum(isinstance(si, Food) for si in self._board.at(x, y).my_sprites())
+
+    def __info(self) -> dict:
+        pacman = self._engine.pacman
+        return {"points": pacman.points, "lives": pacman.lives, "ticks": self._engine.ticks,
+                "status": self._engine.status}
+
+    def reset(self, seed: int = None) -> tuple[np.ndarray, dict]:
+        """
+        Starts a new game and returns its first observation and info dictionary.
+
+        Parameters
+        ----------
+           seed: seed of the game, drawn from system randomness if not given
+        """
+
+        self._board.restore(self._empty)
+        self._move.direction = StartingDirection.START
+        self._engine = GameEngine.from_board(self._board, self._move, self._ghost_strategies, seed, self._two_phase)
+
+        self._obs[FOOD:] = 0
+        for x, y in self._board.positions_by_type(Food):
+            self._obs[FOOD, x, y] = 1
+        for si in self._engine.sprites:
+            self._obs[PACMAN if si is self._engine.pacman else GHOSTS, si.x, si.y] = 1
+
+        return self._obs, self.__info()
+
+    def step(self, action: int) -> tuple[np.ndarray, float, bool, bool, dict]:
+        """
+        Advances the game by one tick and returns observation, reward, terminated and truncated flags
+        and info dictionary.
+
+        Parameters
+        ----------
+           action: code of PacMan direction, index into ACTIONS
+        """
+
+        engine = self._engine
+        if engine is None:
+            raise ValueError("Environment has to be reset before the first step")
+
+        pacman = engine.pacman
+        positions = [(si.x, si.y) for si in engine.sprites]
+        points, lives = pacman.points, pacman.lives
+
+        self._move.direction = ACTIONS[action]
+        status = engine.step()
+
+        obs = self._obs
+        for x, y in positions:
+            obs[GHOSTS:, x, y] = 0
+        for si in engine.sprites:
+            if si is not pacman:
+                obs[GHOSTS, si.x, si.y] = 1
+        if pacman.lives > 0:
+            obs[PACMAN, pacman.x, pacman.y] = 1
+
+        if pacman.points != points:
+            # food is eaten in the cell PacMan entered, or tried to enter when it lost its last life
+            x, y = positions[engine.sprites.index(pacman)]
+            for xf, yf in ((x, y), *((x + d.value[0], y + d.value[1]) for d in self._board.directions(x, y))):
+                obs[FOOD, xf, yf] = self.__food_at(xf, yf)
+
+        reward = pacman.points - points - self._life_penalty * (lives - pacman.lives)
+        terminated = status is not GameStatus.RUNNING
+        truncated = not terminated and engine.ticks >= self._max_ticks
+
+        return obs, reward, terminated, truncated, self.__info()
+
+
+class VectorPacManEnv:
+    """
+        A class to represent many PacMan games on the same board as one vectorized environment,
+        simulated in lockstep by BatchEngine. Games that end are restarted within the same step,
+        so the observation of an ended game is the first observation of the next one, and its
+        final points, lives and ticks are reported in the info dictionary.
+        ...
+        Attributes
+        ----------
+        _engine : BatchEngine
+            engine of all games, PacMan moved by ManualWalk
+        _max_ticks : int
+            number of ticks after which a game is truncated
+        _life_penalty : float
+            reward lost with every PacMan life
+        _obs : numpy.ndarray
+            (games, channels, height, width) observations, updated in place
+        _cells : numpy.ndarray
+            (games, channels, cells) view of the observations, cells addressed by flat index
+
+        Methods
+        -------
+        n_envs():
+            Returns number of games.
+        observation():
+            Returns observation array of the environment.
+        engine():
+            Returns engine of all games.
+        reset():
+            Starts new games and returns their first observations.
+        step():
+            Advances all games by one tick with PacMan actions.
+    """
+
+    def __init__(self, lines: str, n_envs: int, ghost_strategies: tuple = DEFAULT_GHOST_STRATEGIES,
+                 max_ticks: int = 10000, life_penalty: float = 10.0, seed: int = None):
+        """
+        Constructs necessary attributes for the environment.
+
+        Parameters
+        ----------
+            lines : str
+                string representing pacman game board
+            n_envs : int
+                number of games
+            ghost_strategies : tuple
+                moving strategy class of each ghost, RandomWalk or PersistentWalk
+            max_ticks : int
+                number of ticks after which a game is truncated
+            life_penalty : float
+                reward lost with every PacMan life
+            seed : int
+                seed of the first games, drawn from system randomness if not given
+        """
+        self._n_envs = n_envs
+        self._ghost_strategies = tuple(ghost_strategies)
+        self._max_ticks = max_ticks
+        self._life_penalty = life_penalty
+
+        board = ArrayBoard.board_from_str(lines)
+        self._board = board
+        self._engine = BatchEngine(board, n_envs, self._ghost_strategies, ManualWalk, seed=seed)
+
+        self._obs = np.zeros((n_envs, N_CHANNELS, board.height(), board.width()), dtype=np.uint8)
+        self._obs[:, WALLS] = board.walls
+        self._cells = self._obs.reshape(n_envs, N_CHANNELS, -1)
+        self.__reset_observations(np.arange(n_envs))
+
+    @property
+    def n_envs(self):
+        return self._n_envs
+
+    @property
+    def observation(self):
+        return self._obs
+
+    @property
+    def engine(self):
+        return self._engine
+
+    def __reset_observations(self, games: np.ndarray):
+        engine = self._engine
+        cells = self._cells
+
+        cells[games, FOOD] = engine.food[games]
+        cells[games, GHOSTS:] = 0
+        cells[games[:, None], GHOSTS, engine.ghosts[games]] = 1
+        cells[games, PACMAN, engine.pacman[games]] = 1
+
+    def reset(self, seed: int = None) -> tuple[np.ndarray, dict]:
+        """
+        Starts new games and returns their first observations and info dictionary.
+
+        Parameters
+        ----------
+           seed: seed of the games, drawn from system randomness if not given
+        """
+
+        self._engine = BatchEngine(self._board, self._n_envs, self._ghost_strategies, ManualWalk, seed=seed)
+        self.__reset_observations(np.arange(self._n_envs))
+
+        return self._obs, {}
+
+    def step(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict]:
+        """
+        Advances all games by one tick and returns observations, rewards, terminated and truncated flags
+        and info dictionary with final points, lives and ticks of every game, meaningful for ended games.
+
+        Parameters
+        ----------
+           actions: code of PacMan direction in each game, indexes into ACTIONS
+        """
+
+        engine = self._engine
+        cells = self._cells
+        games = np.arange(self._n_envs)
+
+        ghosts, pacman = engine.ghosts.copy(), engine.pacman.copy()
+        points, lives = engine.points.copy(), engine.lives.copy()
+
+        status = engine.step(ACTION_DIRECTIONS[actions])
+
+        cells[games[:, None], GHOSTS, ghosts] = 0
+        cells[games[:, None], GHOSTS, engine.ghosts] = 1
+        cells[games, PACMAN, pacman] = 0
+        cells[games, PACMAN, engine.pacman] = engine.lives > 0
+        cells[games, FOOD, engine.pacman] = engine.food[games, engine.pacman]
+
+        rewards = (engine.points - points) - self._life_penalty * (lives - engine.lives)
+        terminated = status != RUNNING
+        truncated = ~terminated & (engine.ticks >= self._max_ticks)
+        info = {"points": engine.points.copy(), "lives": engine.lives.copy(), "ticks": engine.ticks.copy()}
+
+        ended = np.flatnonzero(terminated | truncated)
+        if len(ended):
+            engine.reset(ended)
+            self.__reset_observations(ended)
+
+        return self._obs, rewards, terminated, truncated, info
@@ -0,0 +1,154 @@
+from collections import deque
+from contextlib import contextmanager, nullcontext
+import json
+import time
+
+# upper bounds of histogram buckets in seconds, from 1 microsecond doubling up to about 1 second
+HISTOGRAM_BOUNDS = tuple(1e-6 * 2 ** n for n in range(21))
+
+
+class TickProfiler:
+    """
+        A class to time phases of game ticks, keeping a rolling window of recent samples per phase.
+        ...
+        Attributes
+        ----------
+        _window : int
+            number of recent samples kept per phase
+        _samples : dict
+            deque of recent durations in seconds, keyed by phase name
+        _totals : dict
+            number of samples and total duration of all samples, keyed by phase name
+
+        Methods
+        -------
+        phase():
+            Returns context manager timing a phase.
+        record():
+            Adds a duration of a phase.
+        phases():
+            Returns names of recorded phases.
+        stats():
+            Returns statistics of recent samples of a phase.
+        histogram():
+            Returns counts of recent samples of a phase in HISTOGRAM_BOUNDS buckets.
+        report():
+            Returns statistics of all phases as a dictionary.
+        lines():
+            Returns statistics of all phases as lines of text.
+        dump():
+            Writes statistics of all phases to a file.
+    """
+
+    def __init__(self, window: int = 1000):
+        """
+        Constructs necessary attributes for the profiler object.
+
+        Parameters
+        ----------
+            window : int
+                number of recent samples kept per phase
+        """
+        self._window = window
+        self._samples = {}
+        self._totals = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        samples = self._samples.get(name)
+
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self._window)
+            self._totals[name] = [0, 0.0]
+
+        samples.append(seconds)
+        totals = self._totals[name]
+        totals[0] += 1
+        totals[1] += seconds
+
+    def phases(self) -> list[str]:
+        return list(self._samples)
+
+    def stats(self, name: str) -> dict:
+        """
+        Returns number, mean, median, 95th percentile and maximum of recent samples of a phase,
+        together with number and total duration of all its samples.
+
+        Parameters
+        ----------
+           name: phase name
+        """
+
+        samples = sorted(self._samples[name])
+        n = len(samples)
+
+        return {
+            "count": self._totals[name][0],
+            "total": self._totals[name][1],
+            "recent": n,
+            "mean": sum(samples) / n,
+            "p50": samples[n // 2],
+            "p95": samples[min(n - 1, n * 95 // 100)],
+            "max": samples[-1],
+        }
+
+    def histogram(self, name: str) -> list[int]:
+        counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+
+        for seconds in self._samples[name]:
+            bucket = 0
+            while bucket < len(HISTOGRAM_BOUNDS) and seconds > HISTOGRAM_BOUNDS[bucket]:
+                bucket += 1
+            counts[bucket] += 1
+
+        return counts
+
+    def report(self) -> dict:
+        return {name: {**self.stats(name), "histogram": self.histogram(name)} for name in self._samples}
+
+    def lines(self) -> list[str]:
+        lines = [f"{'phase':<16} {'count':>8} {'mean ms':>8} {'p95 ms':>8} {'max ms':>8}"]
+
+        for name in self._samples:
+            s = self.stats(name)
+            lines.append(f"{name:<16} {s['count']:>8} {s['mean'] * 1e3:>8.3f} {s['p95'] * 1e3:>8.3f} "
+                         f"{s['max'] * 1e3:>8.3f}")
+
+        return lines
+
+    def dump(self, file, as_json: bool = False):
+        """
+        Writes statistics of all phases to a file.
+
+        Parameters
+        ----------
+           file: text file open for writing
+           as_json: write JSON report with histograms instead of a table
+        """
+
+        if as_json:
+            json.dump({"histogram_bounds": HISTOGRAM_BOUNDS, "phases": self.report()}, file, indent=2)
+            file.write("\n")
+        else:
+            file.write("\n".join(self.lines()) + "\n")
+
+
+class NullProfiler:
+    """
+    A class with the phase() method of TickProfiler doing nothing, used when profiling is disabled.
+    """
+
+    __context = nullcontext()
+
+    def phase(self, name: str):
+        return self.__context
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,294 @@
+"""
+Recording and replaying PacMan games.
+
+A game is fully determined by its seed, board, ghost strategies and PacMan directions chosen by the player,
+as all random draws come from generators seeded with the game seed. A replay stores only these,
+in a compact binary file, and re-simulates the game to play it back.
+
+Usage: python Replay.py replay_file [--profile]
+"""
+
+from dataclasses import dataclass, field
+import argparse
+import struct
+import sys
+import zlib
+from Board import Board
+from GameEngine import GameEngine, GameResult, GameStatus
+from Profiler import TickProfiler
+from SpriteMove import ChaseWalk, Direction, ManualWalk, PersistentWalk, RandomWalk, StartingDirection
+
+MAGIC = b"PMRP"
+VERSION = 2
+
+# header: magic, version, seed, number of ghosts, board length, number of ticks, compressed inputs length
+HEADER = struct.Struct("<4sBQBIII")
+
+# flags following the header since version 2
+FLAGS = struct.Struct("<B")
+TWO_PHASE = 1
+
+# result: points, lives, status code
+RESULT = struct.Struct("<iiB")
+
+# codes of PacMan directions stored per tick
+DIRECTION_CODES = {StartingDirection.START: 0, Direction.RIGHT: 1, Direction.LEFT: 2, Direction.UP: 3,
+                   Direction.DOWN: 4}
+DIRECTIONS = {code: d for d, code in DIRECTION_CODES.items()}
+
+STATUS_CODES = {status: code for code, status in enumerate(GameStatus)}
+STATUSES = list(GameStatus)
+
+# moving strategies a replay can refer to, keyed by class name
+STRATEGIES = {cls.__name__: cls for cls in (RandomWalk, PersistentWalk, ManualWalk, ChaseWalk)}
+
+
+@dataclass
+class Replay:
+    """
+        A class to represent a recorded game.
+        ...
+        Attributes
+        ----------
+        seed : int
+            seed of the game
+        maze : str
+            string representing game board
+        ghost_strategies : tuple
+            moving strategy class of each ghost
+        inputs : bytearray
+            code of PacMan direction in each tick
+        result : GameResult
+            result of the recorded game, None if not known
+        two_phase : bool
+            True if the game was played with two-phase ticks
+
+        Methods
+        -------
+        record_tick():
+            Appends PacMan direction of the next tick.
+        to_bytes():
+            Returns replay in binary format.
+        from_bytes():
+            Returns replay read from binary format.
+        save():
+            Writes replay to a file.
+        load():
+            Returns replay read from a file.
+    """
+    seed: int
+    maze: str
+    ghost_strategies: tuple
+    inputs: bytearray = field(default_factory=bytearray)
+    result: GameResult = None
+    two_phase: bool = False
+
+    def record_tick(self, direction):
+        self.inputs.append(DIRECTION_CODES[direction])
+
+    def to_bytes(self) -> bytes:
+        maze = self.maze.encode("utf-8")
+        ghosts = b"".join(struct.pack("<B", len(cls.__name__)) + cls.__name__.encode("ascii")
+                          for cls in self.ghost_strategies)
+        inputs = zlib.compress(bytes(self.inputs), 9)
+        result = b""
+        if self.result is not None:
+            result = RESULT.pack(self.result.points, self.result.lives, STATUS_CODES[self.result.status])
+
+        return (HEADER.pack(MAGIC, VERSION, self.seed, len(self.ghost_strategies), len(maze), len(self.inputs),
+                            len(inputs))
+                + FLAGS.pack(TWO_PHASE if self.two_phase else 0)
+                + ghosts + maze + inputs + result)
+
+    @staticmethod
+    def from_bytes(data: bytes):
+        """
+        Returns replay read from binary format.
+
+        Parameters
+        ----------
+           data: replay in binary format
+        """
+
+        if len(data) < HEADER.size:
+            raise ValueError("Replay data is truncated")
+
+        magic, version, seed, n_ghosts, maze_length, n_ticks, inputs_length = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a PacMan replay")
+        if version not in (1, VERSION):
+            raise ValueError(f"Unsupported replay version {version}")
+
+        offset = HEADER.size
+        flags = 0
+        if version >= 2:
+            flags, = FLAGS.unpack_from(data, offset)
+            offset += FLAGS.size
+        ghost_strategies = []
+        for _ in range(n_ghosts):
+            length = data[offset]
+            name = data[offset + 1:offset + 1 + length].decode("ascii")
+            if name not in STRATEGIES:
+                raise ValueError(f"Unknown moving strategy {name!r} in replay")
+            ghost_strategies.append(STRATEGIES[name])
+            offset += 1 + length
+
+        maze = data[offset:offset + maze_length].decode("utf-8")
+        offset += maze_length
+
+        inputs = bytearray(zlib.decompress(data[offset:offset + inputs_length]))
+        offset += inputs_length
+        if len(inputs) != n_ticks:
+            raise ValueError("Replay data is truncated")
+
+        result = None
+        if len(data) >= offset + RESULT.size:
+            points, lives, status = RESULT.unpack_from(data, offset)
+            result = GameResult(points, lives, n_ticks, STATUSES[status], seed)
+
+        return Replay(seed, maze, tuple(ghost_strategies), inputs, result, bool(flags & TWO_PHASE))
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @staticmethod
+    def load(path: str):
+        with open(path, "rb") as f:
+            return Replay.from_bytes(f.read())
+
+
+class ReplayPlayer:
+    """
+        A class to re-simulate a recorded game, headless or driving a GUI.
+        Engine states are kept as keyframes every keyframe_interval ticks, so seeking
+        re-simulates at most keyframe_interval ticks.
+        ...
+        Attributes
+        ----------
+        _replay : Replay
+            recorded game
+        _engine : GameEngine
+            engine of the re-simulated game
+        _pacman_move : ManualWalk
+            PacMan moving strategy fed with recorded directions
+        _keyframe_interval : int
+            number of ticks between keyframes
+        _keyframes : dict
+            snapshots of the engine, keyed by tick
+
+        Methods
+        -------
+        engine():
+            Returns engine of the re-simulated game.
+        tick():
+            Returns number of ticks re-simulated.
+        finished():
+            Returns True if all recorded ticks have been re-simulated.
+        step():
+            Re-simulates one recorded tick.
+        run():
+            Re-simulates all remaining ticks and returns result record.
+        seek():
+            Moves the game to a certain tick.
+    """
+
+    def __init__(self, replay: Replay, keyframe_interval: int = 100, board_class=Board):
+        """
+        Constructs necessary attributes for the player and starts the recorded game.
+
+        Parameters
+        ----------
+            replay : Replay
+                recorded game
+            keyframe_interval : int
+                number of ticks between keyframes
+            board_class : type
+                board implementation, Board or ArrayBoard
+        """
+        self._replay = replay
+        self._keyframe_interval = keyframe_interval
+        self._keyframes = {}
+
+        self._pacman_move = ManualWalk()
+        self._engine = GameEngine.new_game(replay.maze, self._pacman_move, board_class, replay.ghost_strategies,
+                                           replay.seed, replay.two_phase)
+        self.__save_keyframe()
+
+    @property
+    def engine(self):
+        return self._engine
+
+    @property
+    def tick(self):
+        return self._engine.ticks
+
+    @property
+    def finished(self) -> bool:
+        return self._engine.ticks >= len(self._replay.inputs) or self._engine.status is not GameStatus.RUNNING
+
+    def __save_keyframe(self):
+        self._keyframes[self._engine.ticks] = self._engine.snapshot()
+
+    def step(self) -> GameStatus:
+        if self.finished:
+            return self._engine.status
+
+        self._pacman_move.direction = DIRECTIONS[self._replay.inputs[self._engine.ticks]]
+        status = self._engine.step()
+
+        if self._engine.ticks % self._keyframe_interval == 0 and self._engine.ticks not in self._keyframes:
+            self.__save_keyframe()
+
+        return status
+
+    def run(self) -> GameResult:
+        while not self.finished:
+            self.step()
+
+        return self._engine.result()
+
+    def seek(self, tick: int):
+        """
+        Moves the game to a certain tick, re-simulating from the nearest keyframe before it.
+
+        Parameters
+        ----------
+           tick: number of ticks, clipped to recorded ticks
+        """
+
+        tick = max(0, min(tick, len(self._replay.inputs)))
+        start = max(t for t in self._keyframes if t <= tick)
+
+        if tick < self._engine.ticks or start > self._engine.ticks:
+            self._engine.restore(self._keyframes[start])
+
+        while self._engine.ticks < tick and not self.finished:
+            self.step()
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Re-simulate a recorded PacMan game at full speed.")
+    parser.add_argument("replay", help="replay file")
+    parser.add_argument("--profile", action="store_true", help="print statistics of tick phases")
+    args = parser.parse_args(argv)
+
+    replay = Replay.load(args.replay)
+    player = ReplayPlayer(replay, keyframe_interval=len(replay.inputs) + 1)
+    if args.profile:
+        player.engine.profiler = TickProfiler(window=len(replay.inputs) + 1)
+
+    result = player.run()
+    print(result)
+
+    if args.profile:
+        player.engine.profiler.dump(sys.stdout)
+
+    if replay.result is not None and (result.points, result.lives, result.status) != \
+            (replay.result.points, replay.result.lives, replay.result.status):
+        print("Result differs from recorded result", replay.result, file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
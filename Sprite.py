@@ -1,6 +1,53 @@
 from abc import ABC
 from SpriteMove import SpriteMove
 
+# collision solvers registered with register_collision(), keyed by (moving sprite class, hit sprite class)
+COLLISION_SOLVERS = {}
+
+# solvers resolved for pairs of concrete sprite classes, None if no solver applies
+_resolved = {}
+
+
+def register_collision(sprite_type: type, hit_type: type, solver):
+    """
+    Registers a solver called when a sprite of sprite_type (or its subclass) moves into a cell
+    holding a sprite of hit_type (or its subclass).
+
+    A solver is called as solver(board, sprite, spritetohit) and returns True if the move has to end
+    without the sprite entering the cell. It may remove spritetohit or sprite from the board.
+
+    Parameters
+    ----------
+       sprite_type: class of moving sprite
+       hit_type: class of sprite to collide with
+       solver: callable solving the collision
+    """
+
+    COLLISION_SOLVERS[(sprite_type, hit_type)] = solver
+    _resolved.clear()
+
+
+def collision_solver(sprite_type: type, hit_type: type):
+    """
+    Returns solver of collision of sprite classes, None if there is none. A solver registered for the closest
+    base classes applies, the moving sprite's classes are matched first.
+
+    Parameters
+    ----------
+       sprite_type: class of moving sprite
+       hit_type: class of sprite to collide with
+    """
+
+    key = (sprite_type, hit_type)
+    if key in _resolved:
+        return _resolved[key]
+
+    solver = next((COLLISION_SOLVERS[(m, h)] for m in sprite_type.__mro__ for h in hit_type.__mro__
+                   if (m, h) in COLLISION_SOLVERS), None)
+    _resolved[key] = solver
+
+    return solver
+
 
 class Sprite(ABC):
     """
@@ -27,6 +74,7 @@ class Sprite(ABC):
         size():
             Returns sprite size.
         """
+    __slots__ = ("_name", "_x", "_y", "_color", "_size")
 
     def __init__(self, name: str, x: int, y: int, color: tuple[int, int, int] = (0, 0, 0), size: float = 0.1):
         self._name = name
@@ -77,6 +125,7 @@ class Food(Sprite):
     A class to represent a food sprite in Pacman game.
 
     """
+    __slots__ = ()
 
     def __init__(self, name: str, x: int, y: int, color: tuple = (147, 240, 250), size: float = 0.1):
         super().__init__(name, x, y, color, size)
@@ -89,54 +138,99 @@ class TravelingSprite(Sprite):
         Attributes
         ----------
         _move_strategy: moving strategy
-        _collision_solver: dispatch for collision solving
+
+        Collisions are solved by solvers registered for sprite classes with register_collision().
 
         Methods
         -------
-        collision_solver():
-            Returns dictionary for collision solving.
+        move_strategy():
+            Returns moving strategy.
+        snapshot():
+            Returns coordinates and state of the sprite.
+        restore():
+            Sets state of the sprite taken by snapshot().
+        target():
+            Returns coordinates of the cell the sprite wants to move into.
+        move_to():
+            Solves collisions in a cell and moves sprite into it.
         mover():
             Moves sprite into new cell.
     """
+    __slots__ = ("_move_strategy",)
 
     def __init__(self, name: str, x: int, y: int, strategy: SpriteMove, color: tuple = (0, 0, 0),
                  size: float = 0.4):
         super().__init__(name, x, y, color, size)
         self._move_strategy = strategy
-        self._collision_solver = {}
 
     @property
-    def collision_solver(self):
-        return self._collision_solver
+    def move_strategy(self):
+        return self._move_strategy
 
-    def mover(self, board):
+    def snapshot(self):
+        return self._x, self._y, self._move_strategy.snapshot()
+
+    def restore(self, state):
+        self._x, self._y = state[0], state[1]
+        self._move_strategy.restore(state[2])
+
+    def target(self, board) -> tuple[int, int]:
         """
-        Moves sprite into new cell, solves possible collisions, sets new coordinates of a sprite.
+        Returns coordinates of the cell the sprite wants to move into, chosen by its moving strategy.
+
+        Parameters
+        ----------
+            board: game board
+        """
+
+        return self._move_strategy.move(board, self.x, self.y)
+
+    def move_to(self, board, xnew: int, ynew: int):
+        """
+        Solves possible collisions in a cell, moves sprite into it unless a collision ended the move.
 
         Parameters
         ----------
             board: game board
+            xnew: row coordinate of the cell
+            ynew: column coordinate of the cell
         """
 
-        move_done = [False]
-        xnew, ynew = self._move_strategy.move(board, self.x, self.y)
+        sprite_class = type(self)
+        move_done = False
+        sprites = board.at(xnew, ynew).my_sprites()
 
-        for si in board.at(xnew, ynew).my_sprites()[::-1]:
+        # iterating backwards without a copy is safe while solvers remove only the sprite hit,
+        # the cell is copied when the moving sprite, which a solver may remove too, stays in it
+        if xnew == self._x and ynew == self._y:
+            sprites = sprites[:]
 
-            k = str(si.__class__.__name__)
+        for si in reversed(sprites):
+            key = (sprite_class, type(si))
 
-            if k in self.collision_solver.keys():
-                self.collision_solver[k](board, self, si, move_done)
-            else:
-                continue
+            try:
+                solver = _resolved[key]
+            except KeyError:
+                solver = collision_solver(*key)
 
-        if move_done[0]:
+            if solver is not None and solver(board, self, si):
+                move_done = True
+
+        if move_done:
             return
 
-        board.at(xnew, ynew).my_sprites().append(self)
-        board.at(self.x, self.y).my_sprites().remove(self)
+        board.move(self, xnew, ynew)
+
+    def mover(self, board):
+        """
+        Moves sprite into new cell, solves possible collisions, sets new coordinates of a sprite.
+
+        Parameters
+        ----------
+            board: game board
+        """
 
-        self.x, self.y = xnew, ynew
+        self.move_to(board, *self.target(board))
 
 
 class PacMan(TravelingSprite):
@@ -154,14 +248,18 @@ class PacMan(TravelingSprite):
                 Returns number of lives remaining.
             points():
                 Returns number of points earned.
+            snapshot():
+                Returns coordinates and state of the sprite.
+            restore():
+                Sets state of the sprite taken by snapshot().
     """
+    __slots__ = ("__lives", "__points")
 
     def __init__(self, name: str, x: int, y: int, strategy: SpriteMove, lives=3, points=0,
                  color: tuple = (255, 239, 1), size: float = 0.4):
         super().__init__(name, x, y, strategy, color, size)
         self.__lives = lives
         self.__points = points
-        self._collision_solver = {"Food": EatFood(), "Ghost": PacManHitsGhost()}
 
     @property
     def lives(self):
@@ -179,21 +277,28 @@ class PacMan(TravelingSprite):
     def points(self, n_points: int):
         self.__points = n_points
 
+    def snapshot(self):
+        return super().snapshot(), self.__lives, self.__points
+
+    def restore(self, state):
+        super().restore(state[0])
+        self.__lives, self.__points = state[1], state[2]
+
 
 class Ghost(TravelingSprite):
     """
         A class to represent Ghost sprite.
     """
+    __slots__ = ()
 
     def __init__(self, name: str, x: int, y: int, strategy: SpriteMove,
                  color: tuple = (250, 179, 250), size: float = 0.4):
         super().__init__(name, x, y, strategy, color, size)
-        self._collision_solver = {"PacMan": GhostHitsPacMan()}
 
 
 class EatFood:
 
-    def __call__(self, *args):
+    def __call__(self, board, sprite: Sprite, spritetohit: Sprite) -> bool:
         """
         Removes food from a certain cell and adds point to a PacMan.
 
@@ -204,54 +309,56 @@ class EatFood:
         spritetohit: sprite to collide with
         """
 
-        board = args[0]
-        sprite: Sprite = args[1]
-        spritetohit: Sprite = args[2]
-
-        board.at(spritetohit.x, spritetohit.y).my_sprites().remove(spritetohit)
+        board.remove(spritetohit)
         sprite.points = sprite.points + 1
 
+        return False
+
 
 class PacManHitsGhost:
 
-    def __call__(self, *args):
+    def __call__(self, board, sprite: Sprite, spritetohit: Sprite) -> bool:
         """
         Removes PacMan from a cell in a board if there is no lives remaining, otherwise removes one life.
+        Ends move if PacMan is removed from board.
 
         Parameters
         ---------
         board: game board
         sprite: currently moving sprite
-        move_done: ends move if PacMan is removed from board
+        spritetohit: sprite to collide with
         """
 
-        board = args[0]
-        sprite: Sprite = args[1]
-        move_done: list = args[3]
-
         sprite.lives = sprite.lives - 1
 
         if sprite.lives == 0:
-            board.at(sprite.x, sprite.y).my_sprites().remove(sprite)
-            move_done[0] = True
+            board.remove(sprite)
+            return True
+
+        return False
 
 
 class GhostHitsPacMan:
 
-    def __call__(self, *args):
+    def __call__(self, board, sprite: Sprite, spritetohit: Sprite) -> bool:
         """
-        Removes PacMan from a cell in a board if there is no lives remaining, otherwise removes one PacMan life..
+        Removes PacMan from a cell in a board if there is no lives remaining, otherwise removes one PacMan life.
 
         Parameters
         ---------
         board: game board
+        sprite: currently moving sprite
         spritetohit: sprite to collide with
         """
 
-        board = args[0]
-        spritetohit: Sprite = args[2]
-
         spritetohit.lives = spritetohit.lives - 1
 
         if spritetohit.lives == 0:
-            board.at(spritetohit.x, spritetohit.y).my_sprites().remove(spritetohit)
+            board.remove(spritetohit)
+
+        return False
+
+
+register_collision(PacMan, Food, EatFood())
+register_collision(PacMan, Ghost, PacManHitsGhost())
+register_collision(Ghost, PacMan, GhostHitsPacMan())
@@ -18,6 +18,49 @@ class StartingDirection(Enum):
 
 
 class SpriteMove(ABC):
+    """
+    Class to represent strategy of moving a sprite.
+
+    Attributes
+    ----------
+    _rng: random number generator, global random module if not given
+
+    Methods
+    -------
+    rng():
+        Returns random number generator of the strategy.
+    snapshot():
+        Returns state of the strategy.
+    restore():
+        Sets state of the strategy taken by snapshot().
+    move():
+        Returns coordinates of a sprite after making a move.
+    """
+
+    def __init__(self, rng: random.Random = None):
+        self._rng = rng if rng is not None else random
+
+    @property
+    def rng(self):
+        return self._rng
+
+    @rng.setter
+    def rng(self, rng: random.Random):
+        self._rng = rng
+
+    def snapshot(self):
+        return self._rng.getstate()
+
+    def restore(self, state):
+        self._rng.setstate(state)
+
+    def __getstate__(self):
+        # the global random module can not be pickled, a copy gets its own generator in the same state
+        state = self.__dict__.copy()
+        if state["_rng"] is random:
+            state["_rng"] = random.Random()
+            state["_rng"].setstate(random.getstate())
+        return state
 
     @abstractmethod
     def move(self, board, x: int, y: int):
@@ -44,7 +87,7 @@ class RandomWalk(SpriteMove):
            y : current y coordinate
         """
         possible_moves = board.directions(x, y)  # possible moves from current position
-        d = random.choice(possible_moves)
+        d = self._rng.choice(possible_moves)
         xnew = x + d.value[0]
         ynew = y + d.value[1]
         return xnew, ynew
@@ -66,13 +109,21 @@ class PersistentWalk(SpriteMove):
         move():
             Returns coordinates of a sprite after making a move.
     """
-    def __init__(self):
+    def __init__(self, rng: random.Random = None):
+        super().__init__(rng)
         self.__current_direction = Direction.RIGHT
 
     @property
     def current_direction(self):
         return self.__current_direction
 
+    def snapshot(self):
+        return super().snapshot(), self.__current_direction
+
+    def restore(self, state):
+        super().restore(state[0])
+        self.__current_direction = state[1]
+
     def move(self, board, x: int, y: int) -> tuple[int, int]:
         """
         Returns new coordinates of a sprite after making a move.
@@ -86,7 +137,7 @@ class PersistentWalk(SpriteMove):
         possible_moves = board.directions(x, y)  # possible moves from current position
 
         if self.__current_direction not in possible_moves:
-            self.__current_direction = random.choice(possible_moves)
+            self.__current_direction = self._rng.choice(possible_moves)
 
         xnew = x + self.__current_direction.value[0]
         ynew = y + self.__current_direction.value[1]
@@ -110,7 +161,8 @@ class ManualWalk(SpriteMove):
             Returns coordinates of a sprite after making a move.
     """
 
-    def __init__(self):
+    def __init__(self, rng: random.Random = None):
+        super().__init__(rng)
         self.__direction = StartingDirection.START  # at the beginning sprite does not move
 
     @property
@@ -121,6 +173,13 @@ class ManualWalk(SpriteMove):
     def direction(self, d):
         self.__direction = d
 
+    def snapshot(self):
+        return super().snapshot(), self.__direction
+
+    def restore(self, state):
+        super().restore(state[0])
+        self.__direction = state[1]
+
     def move(self, board, x: int, y: int) -> tuple[int, int]:
         """
         Returns new coordinates of a sprite after making a move.
@@ -141,3 +200,74 @@ class ManualWalk(SpriteMove):
             return xnew, ynew
         else:
             return x, y
+
+
+class ChaseWalk(SpriteMove):
+    """
+        Class to represent strategy of moving along a shortest path to the nearest target sprite.
+        Distances come from the board's cached distance maps, searched only as far as the cells
+        the sprite can move to, so a move mostly costs a few lookups.
+        When no target is reachable, the sprite moves in a random direction.
+
+        Attributes
+        ----------
+        __target_type: class of sprites to chase, PacMan if not given.
+
+        Methods
+        -------
+        target_type():
+            Returns class of chased sprites.
+        move():
+            Returns coordinates of a sprite after making a move.
+    """
+
+    def __init__(self, rng: random.Random = None, target_type: type = None):
+        super().__init__(rng)
+
+        if target_type is None:
+            from Sprite import PacMan  # Sprite imports this module
+            target_type = PacMan
+
+        self.__target_type = target_type
+
+    @property
+    def target_type(self):
+        return self.__target_type
+
+    def move(self, board, x: int, y: int) -> tuple[int, int]:
+        """
+        Returns new coordinates of a sprite after making a move.
+
+        Parameters
+        ----------
+           board : game board
+           x : current x coordinate
+           y : current y coordinate
+        """
+        possible_moves = board.directions(x, y)  # possible moves from current position
+        width = board.width()
+        neighbours = [(x + d.value[0]) * width + y + d.value[1] for d in possible_moves]
+
+        best_moves = []
+        best_distance = -1
+
+        for tx, ty in board.positions_by_type(self.__target_type):
+            distances = board.distance_map(tx, ty, neighbours)
+
+            for d, cell in zip(possible_moves, neighbours):
+                distance = distances[cell]
+
+                if distance < 0 or (best_distance >= 0 and distance > best_distance):
+                    continue
+                if distance != best_distance:
+                    best_moves = []
+                    best_distance = distance
+                if d not in best_moves:
+                    best_moves.append(d)
+
+        if not best_moves:
+            best_moves = possible_moves
+
+        d = best_moves[0] if len(best_moves) == 1 else self._rng.choice(best_moves)
+
+        return x + d.value[0], y + d.value[1]
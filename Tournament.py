@@ -0,0 +1,222 @@
+"""
+Runs headless PacMan games for sets of boards, strategies and seeds on a process pool
+and aggregates their results.
+
+Usage: python Tournament.py [maze files] --strategy random --strategy persistent --seeds 100
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from functools import partial
+import argparse
+import json
+import os
+import sys
+from Board import Board
+from GameEngine import DEFAULT_GHOST_STRATEGIES, GameEngine, GameResult
+from Mazes import board_drawn
+from SpriteMove import ChaseWalk, PersistentWalk, RandomWalk
+from TreeSearch import MonteCarloWalk
+
+
+@dataclass(frozen=True)
+class StrategyConfig:
+    """
+        A class to represent a configuration of moving strategies of a game.
+        ...
+        Attributes
+        ----------
+        name : str
+            configuration name used in reports
+        pacman_strategy : type
+            moving strategy class of PacMan, or other callable returning the strategy
+        ghost_strategies : tuple
+            moving strategy class of each ghost
+    """
+    name: str
+    pacman_strategy: type = RandomWalk
+    ghost_strategies: tuple = DEFAULT_GHOST_STRATEGIES
+
+
+@dataclass
+class TournamentSummary:
+    """
+        A class to represent aggregated results of games of one strategy configuration on one board.
+        ...
+        Attributes
+        ----------
+        maze : str
+            board name
+        strategy : str
+            strategy configuration name
+        games : int
+            number of games played
+        win_rate : float
+            fraction of games won by PacMan
+        mean_points : float
+            mean number of points earned
+        mean_ticks : float
+            mean number of ticks until the end of a game
+    """
+    maze: str
+    strategy: str
+    games: int
+    win_rate: float
+    mean_points: float
+    mean_ticks: float
+
+
+# strategy configurations available from the command line
+STRATEGIES = {
+    "random": StrategyConfig("random", RandomWalk),
+    "persistent": StrategyConfig("persistent", PersistentWalk),
+    "chase": StrategyConfig("chase", RandomWalk, (ChaseWalk, ChaseWalk, PersistentWalk, PersistentWalk)),
+    # a fixed number of iterations keeps games reproducible, unlike a time budget
+    "mcts": StrategyConfig("mcts", partial(MonteCarloWalk, iterations=50)),
+}
+
+# configurations played when none is chosen, tree search is too slow for many seeds
+DEFAULT_STRATEGIES = ("chase", "persistent", "random")
+
+# boards of the running worker process, keyed by name
+_mazes = {}
+
+# BoardCache of the running worker process, None to parse boards in every game
+_board_cache = None
+
+
+def _init_worker(mazes: dict[str, str], board_cache: bool = False):
+    global _board_cache
+
+    _mazes.update(mazes)
+
+    if board_cache:
+        try:
+            # the cache stores boards as NumPy arrays
+            from BoardCache import BoardCache
+        except ImportError:
+            return
+        _board_cache = BoardCache()
+
+
+def play_game(maze: str, strategy: StrategyConfig, seed: int, max_ticks: int, board_class=Board) -> GameResult:
+    """
+    Plays one headless game in the worker process and returns its result.
+
+    Parameters
+    ----------
+       maze: name of a board given to the worker
+       strategy: strategy configuration
+       seed: seed of random number generator
+       max_ticks: maximal number of ticks of a game
+       board_class: board implementation, Board or ArrayBoard
+    """
+
+    lines = _mazes[maze]
+    board = _board_cache.board(lines, board_class) if _board_cache is not None else board_class.board_from_str(lines)
+    engine = GameEngine.from_board(board, strategy.pacman_strategy(), strategy.ghost_strategies, seed)
+
+    return engine.run(max_ticks)
+
+
+def _play_task(task: tuple) -> GameResult:
+    return play_game(*task)
+
+
+def summarize(maze: str, strategy: str, results: list[GameResult]) -> TournamentSummary:
+    n = len(results)
+    if n == 0:
+        return TournamentSummary(maze, strategy, 0, 0.0, 0.0, 0.0)
+
+    return TournamentSummary(maze, strategy, n,
+                             sum(r.won for r in results) / n,
+                             sum(r.points for r in results) / n,
+                             sum(r.ticks for r in results) / n)
+
+
+def run_tournament(mazes: dict[str, str], strategies: list[StrategyConfig], seeds, max_ticks: int = 10000,
+                   workers: int = None, board_class=Board, board_cache: bool = True) -> list[TournamentSummary]:
+    """
+    Plays every strategy configuration on every board with every seed, one worker process per core,
+    and returns summaries in order of boards and strategies.
+
+    Parameters
+    ----------
+       mazes: strings representing boards, keyed by name
+       strategies: strategy configurations
+       seeds: seeds of games, one game per board, configuration and seed
+       max_ticks: maximal number of ticks of a game
+       workers: number of worker processes, number of cores if not given
+       board_class: board implementation, Board or ArrayBoard
+       board_cache: if True, workers load boards through BoardCache, needs NumPy
+    """
+
+    seeds = list(seeds)
+    if not seeds:
+        raise ValueError("At least one seed is needed")
+
+    tasks = [(maze, strategy, seed, max_ticks, board_class)
+             for maze in mazes for strategy in strategies for seed in seeds]
+
+    if workers is None:
+        workers = os.cpu_count()
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(mazes, board_cache)) as executor:
+        results = list(executor.map(_play_task, tasks, chunksize=max(1, len(tasks) // (4 * workers))))
+
+    summaries = []
+    for n in range(0, len(results), len(seeds)):
+        maze, strategy = tasks[n][:2]
+        summaries.append(summarize(maze, strategy.name, results[n:n + len(seeds)]))
+
+    return summaries
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Run headless PacMan games on a process pool.")
+    parser.add_argument("mazes", nargs="*", help="board files, built-in board if not given")
+    parser.add_argument("--strategy", action="append", choices=sorted(STRATEGIES),
+                        help="strategy configuration, may be repeated (default: " + ", ".join(DEFAULT_STRATEGIES) + ")")
+    parser.add_argument("--seeds", type=int, default=100, help="number of seeds per board and strategy")
+    parser.add_argument("--max-ticks", type=int, default=10000, help="maximal number of ticks of a game")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--array-board", action="store_true", help="use NumPy-backed ArrayBoard")
+    parser.add_argument("--no-board-cache", action="store_true", help="parse boards in every game")
+    parser.add_argument("--json", action="store_true", help="print summaries as JSON")
+    args = parser.parse_args(argv)
+
+    if args.seeds < 1:
+        parser.error(f"--seeds has to be at least 1, got {args.seeds}")
+    if args.workers is not None and args.workers < 1:
+        parser.error(f"--workers has to be at least 1, got {args.workers}")
+
+    mazes = {}
+    for path in args.mazes:
+        with open(path) as f:
+            mazes[path] = f.read()
+    if not mazes:
+        mazes["board_drawn"] = board_drawn
+
+    strategies = [STRATEGIES[name] for name in (args.strategy or DEFAULT_STRATEGIES)]
+    board_class = Board
+    if args.array_board:
+        # NumPy is only needed for the array-backed board
+        from ArrayBoard import ArrayBoard
+        board_class = ArrayBoard
+
+    summaries = run_tournament(mazes, strategies, range(args.seeds), args.max_ticks, args.workers, board_class,
+                               not args.no_board_cache)
+
+    if args.json:
+        json.dump([asdict(s) for s in summaries], sys.stdout, indent=2)
+        print()
+        return
+
+    print(f"{'maze':<24} {'strategy':<12} {'games':>6} {'win rate':>9} {'points':>9} {'ticks':>9}")
+    for s in summaries:
+        print(f"{s.maze:<24} {s.strategy:<12} {s.games:>6} {s.win_rate:>9.3f} {s.mean_points:>9.2f} "
+              f"{s.mean_ticks:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+Monte Carlo tree search moving strategy for PacMan.
+
+Rollouts are played on the game board itself with TravelingSprite.mover and the usual collision
+solvers, and the board is put back with snapshot() and restore() after every rollout.
+"""
+
+from concurrent.futures import Executor
+import math
+import os
+import pickle
+import random
+import threading
+import time
+from Cell import Wall
+from Sprite import Food, TravelingSprite
+from SpriteMove import SpriteMove
+
+# time limit of the search per tick in seconds, used if neither budget nor iterations are given
+DEFAULT_BUDGET = 0.02
+
+# boards of the running worker thread, keyed by board class and board string
+_local = threading.local()
+
+
+class _Node:
+    """
+        A class to represent a node of the search tree: a sequence of PacMan moves from the current state.
+        ...
+        Attributes
+        ----------
+        visits : int
+            number of rollouts through the node
+        value : float
+            sum of rewards of rollouts through the node
+        children : dict
+            child nodes, keyed by direction
+    """
+
+    def __init__(self):
+        self.visits = 0
+        self.value = 0.0
+        self.children = {}
+
+
+def _advance(board, pacman, ghosts, d, ghosts_move: bool):
+    """
+    Plays one tick of a rollout: ghosts move first, PacMan moves last in direction d, stays if d is None.
+    """
+
+    if ghosts_move:
+        for si in ghosts:
+            si.mover(board)
+            if pacman.lives == 0:
+                return
+
+    if d is not None:
+        pacman.move_to(board, pacman.x + d.value[0], pacman.y + d.value[1])
+
+
+def search(board, pacman, ghosts: list, rng: random.Random, deadline: float = None, iterations: int = None,
+           depth: int = 20, exploration: float = 1.0) -> dict:
+    """
+    Runs Monte Carlo tree search for PacMan's move in the current tick, in which ghosts have already moved,
+    and returns (visits, value) of each first move. The board and sprites are restored when the search ends.
+
+    Every iteration descends the tree choosing moves by UCB1, adds one node and plays random moves
+    until depth ticks are simulated or PacMan loses a life. Ghosts keep their moving strategies,
+    with generators reseeded from rng in each rollout. Strategies using the global random module
+    get their own generators during the search, so that the global one is never reseeded. The reward is the food eaten divided by depth,
+    minus 1 if PacMan lost a life, plus 1 if all food was eaten.
+
+    Parameters
+    ----------
+       board: game board
+       pacman: PacMan sprite
+       ghosts: ghost sprites in order they move in
+       rng: random number generator of the search
+       deadline: time.perf_counter() value to stop at, no time limit if not given
+       iterations: maximal number of iterations, no limit if not given
+       depth: number of ticks simulated in each iteration
+       exploration: exploration constant of UCB1
+    """
+
+    root_board = board.snapshot()
+    ghost_states = [si.snapshot() for si in ghosts]
+    lives, points = pacman.lives, pacman.points
+    root = _Node()
+    n = 0
+
+    shared = [si.move_strategy for si in ghosts if si.move_strategy.rng is random]
+    for strategy in shared:
+        strategy.rng = random.Random()
+
+    try:
+        while (iterations is None or n < iterations) and (deadline is None or time.perf_counter() < deadline or n == 0):
+            n += 1
+
+            if n > 1:
+                board.restore(root_board)
+                pacman.lives, pacman.points = lives, points
+            for si, state in zip(ghosts, ghost_states):
+                si.restore(state)
+                if si.move_strategy.rng is not rng:
+                    si.move_strategy.rng.seed(rng.getrandbits(64))
+
+            node = root
+            path = [root]
+            ticks = 0
+
+            # selection and expansion
+            while ticks < depth and pacman.lives == lives:
+                moves = board.directions(pacman.x, pacman.y)
+                if not moves:
+                    break
+
+                untried = [d for d in moves if d not in node.children]
+                if untried:
+                    d = untried[0] if len(untried) == 1 else rng.choice(untried)
+                    node.children[d] = _Node()
+                else:
+                    log_visits = math.log(node.visits)
+                    d = max(moves, key=lambda m: node.children[m].value / node.children[m].visits
+                            + exploration * math.sqrt(log_visits / node.children[m].visits))
+
+                _advance(board, pacman, ghosts, d, ticks > 0)
+                ticks += 1
+                node = node.children[d]
+                path.append(node)
+
+                if untried:
+                    break
+
+            # rollout
+            while ticks < depth and pacman.lives == lives:
+                moves = board.directions(pacman.x, pacman.y)
+                _advance(board, pacman, ghosts, rng.choice(moves) if moves else None, ticks > 0)
+                ticks += 1
+
+            won = board.count_by_type(Food) == 0
+            reward = (pacman.points - points) / depth - (pacman.lives < lives) + won
+
+            for node in path:
+                node.visits += 1
+                node.value += reward
+
+            if won and len(path) == 2:
+                # the first move eats the last food
+                break
+    finally:
+        for strategy in shared:
+            strategy.rng = random
+
+        board.restore(root_board)
+        pacman.lives, pacman.points = lives, points
+        for si, state in zip(ghosts, ghost_states):
+            si.restore(state)
+
+    return {d: (child.visits, child.value) for d, child in root.children.items()}
+
+
+def _search_task(task: bytes, seed: int, budget: float, iterations: int, depth: int, exploration: float) -> dict:
+    """
+    Runs search() on a copy of the game in a worker thread or process.
+
+    Parameters
+    ----------
+       task: pickled board class, board string, board snapshot, PacMan and ghosts
+       seed: seed of random number generator of the search
+       budget: time limit of the search in seconds, None for no limit
+       iterations: maximal number of iterations, None for no limit
+       depth: number of ticks simulated in each iteration
+       exploration: exploration constant of UCB1
+    """
+
+    deadline = None if budget is None else time.perf_counter() + budget
+    board_class, lines, snapshot, pacman, ghosts = pickle.loads(task)
+
+    boards = getattr(_local, "boards", None)
+    if boards is None:
+        boards = _local.boards = {}
+
+    board = boards.get((board_class, lines))
+    if board is None:
+        board = boards[(board_class, lines)] = board_class.board_from_str(lines)
+
+    board.restore(snapshot)
+
+    return search(board, pacman, ghosts, random.Random(seed), deadline, iterations, depth, exploration)
+
+
+class MonteCarloWalk(SpriteMove):
+    """
+        Class to represent PacMan strategy choosing moves by Monte Carlo tree search over simulated rollouts.
+        PacMan has to move after the ghosts in each tick, ghosts are simulated in order of their names.
+        Rollouts move sprites one after another, also in games with two-phase ticks.
+        With a time budget the chosen moves depend on machine speed, with iterations alone they are reproducible.
+
+        Attributes
+        ----------
+        _budget: time limit of the search per tick in seconds, None for no limit
+        _iterations: maximal number of iterations per tick, None for no limit
+        _depth: number of ticks simulated in each iteration
+        _exploration: exploration constant of UCB1
+        _pool: executor running searches in parallel, None to search in the calling thread
+        _tasks: number of parallel searches per tick, their statistics are summed
+        _layout: board and its string, sent to pool workers
+
+        Methods
+        -------
+        move():
+            Returns coordinates of a sprite after making a move.
+    """
+
+    def __init__(self, rng: random.Random = None, budget: float = None, iterations: int = None, depth: int = 20,
+                 exploration: float = 1.0, pool: Executor = None, tasks: int = None):
+        super().__init__(rng)
+
+        if iterations is not None and iterations < 1:
+            raise ValueError(f"Number of iterations has to be at least 1, got {iterations}")
+        if budget is not None and budget <= 0:
+            raise ValueError(f"Time budget has to be positive, got {budget}")
+        if tasks is not None and tasks < 1:
+            raise ValueError(f"Number of parallel searches has to be at least 1, got {tasks}")
+
+        if budget is None and iterations is None:
+            budget = DEFAULT_BUDGET
+
+        self._budget = budget
+        self._iterations = iterations
+        self._depth = depth
+        self._exploration = exploration
+        self._pool = pool
+        self._tasks = tasks if tasks is not None else os.cpu_count()
+        self._layout = None
+
+    def __getstate__(self):
+        # the pool stays in the process that owns it
+        state = super().__getstate__()
+        state["_pool"] = None
+        state["_layout"] = None
+        return state
+
+    def __sprites(self, board, x: int, y: int) -> tuple:
+        pacman = None
+        ghosts = []
+
+        for xs, ys in board.positions_by_type(TravelingSprite):
+            for si in board.at(xs, ys).my_sprites():
+                if not isinstance(si, TravelingSprite):
+                    continue
+                if si.move_strategy is self and (xs, ys) == (x, y):
+                    pacman = si
+                else:
+                    ghosts.append(si)
+
+        ghosts.sort(key=lambda si: si.name)
+
+        return pacman, ghosts
+
+    def __lines(self, board) -> str:
+        if self._layout is None or self._layout[0] is not board:
+            self._layout = board, "\n".join("".join("#" if isinstance(board.at(i, j), Wall) else " "
+                                                    for j in range(board.width()))
+                                            for i in range(board.height()))
+
+        return self._layout[1]
+
+    def __parallel_search(self, board, pacman, ghosts: list) -> dict:
+        # every task gets its own copy of the game
+        task = pickle.dumps((type(board), self.__lines(board), board.snapshot(), pacman, ghosts))
+
+        futures = [self._pool.submit(_search_task, task, self._rng.getrandbits(64), self._budget, self._iterations,
+                                     self._depth, self._exploration)
+                   for _ in range(self._tasks)]
+
+        stats = {}
+        for future in futures:
+            for d, (visits, value) in future.result().items():
+                total = stats.get(d, (0, 0.0))
+                stats[d] = (total[0] + visits, total[1] + value)
+
+        return stats
+
+    def move(self, board, x: int, y: int) -> tuple[int, int]:
+        """
+        Returns new coordinates of a sprite after making a move.
+
+        Parameters
+        ----------
+           board : game board
+           x : current x coordinate
+           y : current y coordinate
+        """
+        possible_moves = board.directions(x, y)  # possible moves from current position
+
+        if not possible_moves:
+            return x, y
+
+        if len(possible_moves) == 1:
+            d = possible_moves[0]
+            return x + d.value[0], y + d.value[1]
+
+        pacman, ghosts = self.__sprites(board, x, y)
+
+        if self._pool is not None:
+            stats = self.__parallel_search(board, pacman, ghosts)
+        else:
+            deadline = None if self._budget is None else time.perf_counter() + self._budget
+            stats = search(board, pacman, ghosts, self._rng, deadline, self._iterations, self._depth,
+                           self._exploration)
+
+        # the most visited move, ties broken by mean reward
+        d = max(stats, key=lambda m: (stats[m][0], stats[m][1] / stats[m][0]))
+
+        return x + d.value[0], y + d.value[1]
@@ -0,0 +1,45 @@
+"""
+Files kept between runs to speed up startup, in a per-user cache directory.
+Cached files can always be deleted, they are rebuilt when needed.
+"""
+
+import os
+import tempfile
+
+
+def cache_dir() -> str:
+    """
+    Returns path of the cache directory: PACMAN_CACHE_DIR if set, otherwise pacman
+    in XDG_CACHE_HOME or ~/.cache. The directory is created only when a file is written.
+    """
+
+    path = os.environ.get("PACMAN_CACHE_DIR")
+    if path:
+        return path
+
+    return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                        "pacman")
+
+
+def write_atomic(path: str, data: bytes):
+    """
+    Writes a file through a temporary file renamed over it, so that concurrent readers
+    never see a partly written file. Missing directories are created.
+
+    Parameters
+    ----------
+       path: path of the file
+       data: content of the file
+    """
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
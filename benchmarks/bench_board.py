@@ -0,0 +1,99 @@
+"""
+Board loading and per-call costs of board queries.
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+from common import large_maze
+from Board import Board, FlyweightBoard
+from MazeGenerator import generate_maze
+from Mazes import board_drawn
+from Sprite import Food, PacMan
+
+CALLS = 10000
+
+_large = large_maze(500, 500)
+
+# generated board written once per run, loaded by file benchmarks
+_large_file = os.path.join(tempfile.mkdtemp(), "maze_1000.txt")
+with open(_large_file, "w") as _f:
+    _f.write(generate_maze(1000, 1000, seed=0))
+atexit.register(shutil.rmtree, os.path.dirname(_large_file), True)
+
+_board = Board.board_from_str(board_drawn)
+_board.insert_food()
+
+
+def time_load_board_drawn():
+    Board.board_from_str(board_drawn)
+
+
+def time_load_large():
+    Board.board_from_str(_large)
+
+
+def time_fill_large():
+    Board.board_from_str(_large).insert_food()
+
+
+def time_fill_large_flyweight():
+    FlyweightBoard.board_from_str(_large).insert_food()
+
+
+def time_generate_1000():
+    generate_maze(1000, 1000, seed=0)
+
+
+def time_load_file_1000():
+    Board.board_from_file(_large_file)
+
+
+def time_count_by_type():
+    for _ in range(CALLS // 2):
+        _board.count_by_type(PacMan)
+        _board.count_by_type(Food)
+
+
+time_count_by_type.items = CALLS
+
+
+def time_directions():
+    for _ in range(CALLS):
+        _board.directions(3, 5)
+
+
+time_directions.items = CALLS
+
+try:
+    from ArrayBoard import ArrayBoard
+except ImportError:  # NumPy is not installed
+    pass
+else:
+    def time_load_large_array():
+        ArrayBoard.board_from_str(_large)
+
+    def time_load_file_1000_array():
+        ArrayBoard.board_from_file(_large_file)
+
+    from BoardCache import BoardCache
+
+    # cache entries written once per run, read from disk by a new cache in every call
+    _cache_dir = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, _cache_dir, True)
+    _cache = BoardCache(_cache_dir)
+    _cache.layout(board_drawn)
+    _cache.layout(_large)
+
+    def time_load_board_drawn_cache_memory():
+        _cache.board(board_drawn)
+
+    def time_load_board_drawn_cache_disk():
+        BoardCache(_cache_dir).board(board_drawn)
+
+    def time_load_large_cache_disk():
+        BoardCache(_cache_dir).board(_large)
+
+    def time_load_large_array_cache_disk():
+        BoardCache(_cache_dir).board(_large, ArrayBoard)
@@ -0,0 +1,70 @@
+"""
+Tick throughput of the headless game engine and cost of saving and restoring game state.
+"""
+
+from common import large_maze, run_ticks
+from Board import Board, FlyweightBoard
+from GameEngine import DEFAULT_GHOST_STRATEGIES, GameEngine
+from Mazes import board_drawn
+from SpriteMove import ChaseWalk, PersistentWalk, RandomWalk
+
+TICKS = 1000
+SNAPSHOTS = 1000
+
+# two ghosts chase PacMan along shortest paths, as in the "chase" tournament configuration
+CHASE_GHOSTS = (ChaseWalk, ChaseWalk, PersistentWalk, PersistentWalk)
+
+_large = large_maze(200, 200)
+
+
+def _ticks_benchmark(lines: str, board_class, two_phase: bool = False, ghost_strategies=DEFAULT_GHOST_STRATEGIES):
+    seeds = iter(range(10 ** 9))
+    state = {}
+
+    def new_engine():
+        return GameEngine.new_game(lines, RandomWalk(), board_class, ghost_strategies, next(seeds), two_phase)
+
+    def setup():
+        state["engine"] = new_engine()
+
+    def benchmark():
+        state["engine"] = run_ticks(state["engine"], new_engine, TICKS)
+
+    benchmark.setup = setup
+    benchmark.items = TICKS
+    return benchmark
+
+
+def _snapshot_benchmark(board_class):
+    engine = GameEngine.new_game(board_drawn, RandomWalk(), board_class, seed=0)
+    for _ in range(50):
+        engine.step()
+    start = engine.snapshot()
+
+    def benchmark():
+        # rewind a few ticks of play, as tree search does
+        for _ in range(SNAPSHOTS):
+            engine.step()
+            engine.restore(start)
+            engine.snapshot()
+
+    benchmark.items = SNAPSHOTS
+    return benchmark
+
+
+time_ticks_board_drawn = _ticks_benchmark(board_drawn, Board)
+time_ticks_large = _ticks_benchmark(_large, Board)
+time_ticks_large_flyweight = _ticks_benchmark(_large, FlyweightBoard)
+time_ticks_board_drawn_two_phase = _ticks_benchmark(board_drawn, Board, two_phase=True)
+time_ticks_large_chase = _ticks_benchmark(_large, Board, ghost_strategies=CHASE_GHOSTS)
+time_snapshot_restore = _snapshot_benchmark(Board)
+
+try:
+    from ArrayBoard import ArrayBoard
+except ImportError:  # NumPy is not installed
+    pass
+else:
+    time_ticks_board_drawn_array = _ticks_benchmark(board_drawn, ArrayBoard)
+    time_ticks_large_array = _ticks_benchmark(_large, ArrayBoard)
+    time_ticks_large_chase_array = _ticks_benchmark(_large, ArrayBoard, ghost_strategies=CHASE_GHOSTS)
+    time_snapshot_restore_array = _snapshot_benchmark(ArrayBoard)
@@ -0,0 +1,56 @@
+"""
+Step throughput of the reinforcement learning environments, including observation updates.
+"""
+
+import random
+import common  # noqa: F401
+from Board import Board
+from Mazes import board_drawn
+
+try:
+    import numpy as np
+    from ArrayBoard import ArrayBoard
+    from PacManEnv import ACTIONS, PacManEnv, VectorPacManEnv
+except ImportError:  # NumPy is not installed
+    np = None
+
+STEPS = 1000
+VECTOR_ENVS = 256
+VECTOR_STEPS = 100
+
+
+def _env_benchmark(board_class):
+    env = PacManEnv(board_drawn, board_class)
+    rng = random.Random(0)
+    seeds = iter(range(10 ** 9))
+
+    def setup():
+        env.reset(next(seeds))
+
+    def benchmark():
+        for _ in range(STEPS):
+            obs, reward, terminated, truncated, info = env.step(rng.randrange(len(ACTIONS)))
+            if terminated or truncated:
+                env.reset(next(seeds))
+
+    benchmark.setup = setup
+    benchmark.items = STEPS
+    return benchmark
+
+
+def _vector_env_benchmark():
+    env = VectorPacManEnv(board_drawn, VECTOR_ENVS, seed=0)
+    rng = np.random.default_rng(0)
+
+    def benchmark():
+        for _ in range(VECTOR_STEPS):
+            env.step(rng.integers(0, len(ACTIONS), VECTOR_ENVS))
+
+    benchmark.items = VECTOR_ENVS * VECTOR_STEPS
+    return benchmark
+
+
+if np is not None:
+    time_env_step = _env_benchmark(Board)
+    time_env_step_array = _env_benchmark(ArrayBoard)
+    time_vector_env_step = _vector_env_benchmark()
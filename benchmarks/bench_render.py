@@ -0,0 +1,51 @@
+"""
+Frame drawing time under SDL's dummy video driver.
+"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from common import large_maze  # noqa: E402
+from GameEngine import GameEngine  # noqa: E402
+from Mazes import board_drawn  # noqa: E402
+from SpriteMove import RandomWalk  # noqa: E402
+
+FRAMES = 20
+
+try:
+    import pygame
+    import pacman_main
+except ImportError:  # pygame is not installed
+    pygame = None
+
+
+def _frames_benchmark(lines: str, full: bool, invalidate: bool = False):
+    engine = GameEngine.new_game(lines, RandomWalk(), seed=0)
+    board = engine.board
+    screen = pygame.Surface((board.width() * pacman_main.PXY, board.height() * pacman_main.PXY))
+    renderer = pacman_main.BoardRenderer(board, screen)
+    renderer.draw(engine.sprites)
+
+    def benchmark():
+        for _ in range(FRAMES):
+            engine.step()
+            if full:
+                pacman_main.draw_board(board, screen)
+            else:
+                if invalidate:
+                    renderer.invalidate()
+                renderer.draw(engine.sprites)
+
+    benchmark.items = FRAMES
+    return benchmark
+
+
+if pygame is not None:
+    pygame.init()
+
+    time_draw_board = _frames_benchmark(board_drawn, True)
+    time_draw_board_large = _frames_benchmark(large_maze(60, 100), True)
+    time_renderer_dirty = _frames_benchmark(board_drawn, False)
+    time_renderer_dirty_large = _frames_benchmark(large_maze(60, 100), False)
+    time_renderer_full_large = _frames_benchmark(large_maze(60, 100), False, invalidate=True)
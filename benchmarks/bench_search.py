@@ -0,0 +1,40 @@
+"""
+Monte Carlo tree search throughput, a load test of rollouts on the simulation hot path.
+"""
+
+import random
+from common import large_maze
+from Board import Board
+from GameEngine import GameEngine
+from Mazes import board_drawn
+from TreeSearch import MonteCarloWalk, search
+
+ITERATIONS = 200
+
+_large = large_maze(60, 60)
+
+
+def _search_benchmark(lines: str, board_class):
+    engine = GameEngine.new_game(lines, MonteCarloWalk(iterations=1), board_class, seed=0)
+    for _ in range(20):
+        engine.step()
+    pacman = engine.pacman
+    ghosts = sorted((si for si in engine.sprites if si is not pacman), key=lambda si: si.name)
+    rng = random.Random(0)
+
+    def benchmark():
+        search(engine.board, pacman, ghosts, rng, iterations=ITERATIONS)
+
+    benchmark.items = ITERATIONS
+    return benchmark
+
+
+time_search_board_drawn = _search_benchmark(board_drawn, Board)
+time_search_large = _search_benchmark(_large, Board)
+
+try:
+    from ArrayBoard import ArrayBoard
+except ImportError:  # NumPy is not installed
+    pass
+else:
+    time_search_board_drawn_array = _search_benchmark(board_drawn, ArrayBoard)
@@ -0,0 +1,35 @@
+"""
+Process startup time: importing game modules in a fresh interpreter.
+Headless tools must not import pygame, a benchmark fails if they do.
+"""
+
+import os
+import subprocess
+import sys
+from common import ROOT
+
+# modules used without a window, and the GUI module, which loads pygame only when drawing
+HEADLESS = ("GameEngine", "Tournament", "Replay", "MazeGenerator", "TreeSearch")
+
+
+def _startup_benchmark(code: str):
+    env = dict(os.environ, PYTHONPATH=ROOT, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+
+    def benchmark():
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, check=True)
+
+    return benchmark
+
+
+time_startup_python = _startup_benchmark("pass")
+time_startup_headless = _startup_benchmark(
+    f"import sys, {', '.join(HEADLESS)}\n"
+    "sys.exit('pygame' in sys.modules)")
+time_startup_gui_module = _startup_benchmark(
+    "import sys, pacman_main\n"
+    "sys.exit('pygame.font' in sys.modules)")
+# with the font path cached after the first run
+time_startup_gui_font = _startup_benchmark(
+    "import pacman_main\n"
+    "pacman_main.pygame.font.init()\n"
+    "pacman_main.get_font(24)")
@@ -0,0 +1,58 @@
+"""
+Helpers shared by benchmark modules.
+"""
+
+import os
+import sys
+
+# game modules live in the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from GameEngine import GameStatus  # noqa: E402
+
+
+def large_maze(height: int, width: int) -> str:
+    """
+    Returns wall-enclosed board string of a given size with a regular grid of 3x3 wall blocks,
+    similar to the built-in board.
+
+    Parameters
+    ----------
+       height: number of rows
+       width: number of columns
+    """
+
+    border = "#" * width
+    lines = [border]
+
+    for i in range(1, height - 1):
+        if i % 4 == 0 or i % 4 == 3 or i == height - 2:
+            lines.append("#" + " " * (width - 2) + "#")
+        else:
+            lines.append("#" + "".join("#" if j % 4 in (2, 3) and j < width - 2 else " "
+                                       for j in range(1, width - 1)) + "#")
+
+    lines.append(border)
+
+    return "\n".join(lines)
+
+
+def run_ticks(engine, new_engine, ticks: int):
+    """
+    Steps games for a number of ticks, starting a new game whenever one ends, returns the last engine.
+
+    Parameters
+    ----------
+       engine: GameEngine of the game to step first
+       new_engine: callable returning GameEngine of a new game
+       ticks: number of ticks to simulate
+    """
+
+    for _ in range(ticks):
+        if engine.status is not GameStatus.RUNNING:
+            engine = new_engine()
+        engine.step()
+
+    return engine
@@ -0,0 +1,106 @@
+"""
+Runs benchmarks and prints results as JSON.
+
+Benchmarks are functions named time_* in modules named bench_*.py in this directory.
+A benchmark with an "items" attribute processes that many items (ticks, frames, calls) per call,
+and its throughput is reported as items per second. A benchmark with a "setup" attribute
+is timed once per repeat, with setup called untimed before each call.
+
+Usage: python benchmarks/run.py [-o results.json] [-k name_substring]
+"""
+
+import argparse
+import datetime
+import glob
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+
+import common
+
+MIN_TIME = 0.2
+REPEAT = 5
+
+
+def discover(pattern: str = "") -> list:
+    benchmarks = []
+
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_*.py"))):
+        module_name = os.path.splitext(os.path.basename(path))[0]
+        module = importlib.import_module(module_name)
+
+        for name, func in vars(module).items():
+            full_name = module_name + "." + name
+            if name.startswith("time_") and callable(func) and pattern in full_name:
+                benchmarks.append((full_name, func))
+
+    return benchmarks
+
+
+def measure(func) -> dict:
+    timer = timeit.Timer(func)
+    setup = getattr(func, "setup", None)
+
+    if setup is not None:
+        number = 1
+        times = []
+        for _ in range(REPEAT):
+            setup()
+            times.append(timer.timeit(number))
+    else:
+        number = 1
+        while timer.timeit(number) < MIN_TIME and number < 10 ** 6:
+            number *= 2
+        times = [t / number for t in timer.repeat(REPEAT, number)]
+
+    result = {"seconds": min(times), "mean_seconds": sum(times) / len(times), "number": number, "repeat": REPEAT}
+
+    items = getattr(func, "items", None)
+    if items is not None:
+        result["items"] = items
+        result["items_per_second"] = items / min(times)
+
+    return result
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=common.ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Run PacMan benchmarks.")
+    parser.add_argument("-o", "--output", help="JSON file to write, standard output if not given")
+    parser.add_argument("-k", "--filter", default="", help="run only benchmarks with names containing this")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, func in discover(args.filter):
+        results[name] = measure(func)
+        print(name, f"{results[name]['seconds']:.6g} s", file=sys.stderr)
+
+    report = {
+        "commit": commit(),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,24 +5,49 @@ PacMan GUI and main loop of the game.
 
 from Board import Board
 from Cell import Wall
-from Sprite import Sprite, Food, Ghost, PacMan
-from SpriteMove import RandomWalk, PersistentWalk, ManualWalk, Direction
+from FixedTimestep import FixedTimestep
+from GameEngine import DEFAULT_GHOST_STRATEGIES, GameEngine, GameStatus
+from Mazes import board_drawn
+from Profiler import NULL_PROFILER, TickProfiler
+from Replay import Replay, ReplayPlayer
+from Sprite import Sprite, Food, TravelingSprite
+from SpriteMove import ManualWalk, Direction
+from UserCache import cache_dir, write_atomic
+from functools import lru_cache
+import argparse
+import atexit
+import importlib.util
+import json
+import os
 import sys
-import pygame
-
-board_drawn = """
-#################################
-#      ####                     #
-# #### #### #### #### #### #### #
-#                               #
-# #### #### #### #### #### #### #
-#                               #
-# #### #### #### #### #### #### #
-#                               #
-# ######### #### #### #### ######
-#                          ######
-#################################
-"""
+
+
+def _lazy_import(name: str):
+    """
+    Returns module executed on first attribute access, so that importing this module
+    for constants or drawing functions does not pay for starting pygame.
+
+    Parameters
+    ----------
+    name: module name
+    """
+
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+
+    return module
+
+
+pygame = _lazy_import("pygame")
 
 PXY = 30
 WIDTH = 600
@@ -35,7 +60,80 @@ WALL_COLOR = (255, 0, 0)
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 
-FONT_NAME = pygame.font.match_font('arial')
+FONT_NAME = 'arial'
+
+# resolved font paths, keyed by font name
+FONT_CACHE = "fonts.json"
+
+
+class SpriteAtlas:
+    """
+        A class to keep sprites rasterized into anti-aliased surfaces, once per sprite class, color and size,
+        so that drawing a sprite copies a surface instead of drawing a circle.
+        Surfaces are rasterized on first use.
+        ...
+        Attributes
+        ----------
+        _entries : dict
+            surface, offset of its top left corner from the top left corner of sprite's cell and
+            area of the surface lying inside the cell, keyed by sprite class, color and size
+
+        Methods
+        -------
+        entry():
+            Returns surface, offset and area of a sprite.
+        blit_args():
+            Returns arguments of Surface.blit drawing a sprite.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def entry(self, sprit: Sprite) -> tuple:
+        key = (type(sprit), sprit.color, sprit.size)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = self.__rasterize(*key)
+
+        return entry
+
+    @staticmethod
+    def __rasterize(sprite_class: type, color: tuple, size: float) -> tuple:
+        from pygame import gfxdraw
+
+        radius = int(PXY * size)
+        surface = pygame.Surface((2 * radius + 1, 2 * radius + 1), pygame.SRCALPHA)
+        gfxdraw.filled_circle(surface, radius, radius, radius, color)
+        gfxdraw.aacircle(surface, radius, radius, radius, color)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+
+        # circles touch the top left corner of their cell, food lies a third of the cell further
+        offset = PXY // 3 if issubclass(sprite_class, Food) else 0
+        area = surface.get_rect().clip(pygame.Rect(-offset, -offset, PXY, PXY))
+
+        return surface, offset, area
+
+    def blit_args(self, sprit: Sprite, x: float = None, y: float = None) -> tuple:
+        """
+        Returns surface and screen position of a sprite, arguments of Surface.blit and items of Surface.blits.
+
+        Parameters
+        ----------
+        sprit: sprite to be drawn
+        x: row coordinate to draw the sprite at, may lie between cells, sprite's own if not given
+        y: column coordinate to draw the sprite at, may lie between cells, sprite's own if not given
+        """
+
+        surface, offset, area = self.entry(sprit)
+        if x is None:
+            return surface, (sprit.y * PXY + offset, sprit.x * PXY + offset)
+
+        return surface, (int(PXY * y) + offset, int(PXY * x) + offset)
+
+
+# atlas shared by drawing functions
+ATLAS = SpriteAtlas()
 
 
 def draw_board(brd: Board, screen):
@@ -50,39 +148,219 @@ def draw_board(brd: Board, screen):
 
     # ---------- Set the screen background
     screen.fill(BLACK)
+    blits = []
     for i in range(brd.width()):
         for j in range(brd.height()):
             if isinstance(brd.at(j, i), Wall):
-                pygame.draw.rect(screen, WALL_COLOR, (i * PXY, j * PXY, PXY, PXY))
+                screen.fill(WALL_COLOR, (i * PXY, j * PXY, PXY, PXY))
             else:
-                for s in brd.at(j, i).my_sprites():
-                    draw_sprite(s, screen)
+                blits.extend(ATLAS.blit_args(s) for s in brd.at(j, i).my_sprites())
 
+    screen.blits(blits, False)
 
-def draw_sprite(sprit: Sprite, screen):
+
+def draw_sprite(sprit: Sprite, screen, x: float = None, y: float = None):
     """
-    Draws sprites on a pygame board.
+    Draws sprites on a pygame board, returns rectangle covering the sprite.
 
     Parameters
     ----------
     sprit: sprite to be drawn
     screen: pygame window
+    x: row coordinate to draw the sprite at, may lie between cells, sprite's own if not given
+    y: column coordinate to draw the sprite at, may lie between cells, sprite's own if not given
+    """
+
+    return screen.blit(*ATLAS.blit_args(sprit, x, y))
+
+
+class BoardRenderer:
+    """
+        A class to draw PacMan board in pygame, redrawing only parts of the screen that changed since the last frame.
+        Walls never change, so they are drawn once on a background surface. A cell is redrawn by copying
+        its background and copying its food from the sprite atlas, cropped to the cell. Moving sprites are drawn
+        over cells, at positions interpolated between their previous and current cells, so they move smoothly
+        when frames are drawn more often than ticks. Each frame redraws cells under moving sprites
+        drawn in the last frame, cells moving sprites left or entered (food is eaten only on entering)
+        and cells under rectangles covered by other drawings, like text. All copies of a frame
+        are made with one Surface.blits call.
+        ...
+        Attributes
+        ----------
+        _board : Board
+            game board
+        _screen : pygame.Surface
+            pygame window
+        _atlas : SpriteAtlas
+            pre-rendered sprite surfaces
+        _background : pygame.Surface
+            black surface with walls drawn
+        _sprite_rects : list
+            rectangles of moving sprites drawn in the last frame
+        _full : bool
+            True if the whole board has to be drawn in the next frame
+
+        Methods
+        -------
+        invalidate():
+            Makes the next frame draw the whole board.
+        draw():
+            Draws changed parts of the board and returns their rectangles.
     """
 
-    # sprite coordinates on pygame board
-    x = int(PXY * (sprit.x + sprit.size))
-    y = int(PXY * (sprit.y + sprit.size))
+    def __init__(self, brd: Board, screen, atlas: SpriteAtlas = ATLAS):
+        self._board = brd
+        self._screen = screen
+        self._atlas = atlas
+        self._background = pygame.Surface(screen.get_size())
+        self._background.fill(BLACK)
+        self._sprite_rects = []
+        self._full = True
+
+        for i in range(brd.height()):
+            for j in range(brd.width()):
+                if isinstance(brd.at(i, j), Wall):
+                    self._background.fill(WALL_COLOR, (j * PXY, i * PXY, PXY, PXY))
+
+        if pygame.display.get_surface() is not None:
+            self._background = self._background.convert()
+
+    def invalidate(self):
+        self._full = True
+
+    def __food_blits(self, i: int, j: int, blits: list):
+        # food is cropped, so that redrawing a cell never touches its neighbours
+        for s in self._board.at(i, j).my_sprites():
+            if not isinstance(s, TravelingSprite):
+                surface, offset, area = self._atlas.entry(s)
+                blits.append((surface, (j * PXY + offset, i * PXY + offset), area))
+
+    def __cells_under(self, rect) -> list:
+        rect = pygame.Rect(rect).clip(self._screen.get_rect())
+
+        return [(i, j) for i in range(rect.top // PXY, (rect.bottom - 1) // PXY + 1)
+                for j in range(rect.left // PXY, (rect.right - 1) // PXY + 1)]
+
+    def draw(self, sprites: list, previous: dict = None, alpha: float = 1.0, covered: list = ()) -> list:
+        """
+        Draws parts of the board that changed since the last frame and returns list of their rectangles.
+
+        Parameters
+        ----------
+        sprites: moving sprites of the game
+        previous: cell coordinates of moving sprites before the last tick, keyed by sprite
+        alpha: fraction of the way from previous to current cell to draw moving sprites at
+        covered: rectangles drawn over the board in the last frame, to be redrawn
+        """
+
+        if previous is None:
+            previous = {}
+
+        blits = []
+        if self._full:
+            self._full = False
+            blits.append((self._background, (0, 0)))
+            for i in range(self._board.height()):
+                for j in range(self._board.width()):
+                    if not isinstance(self._board.at(i, j), Wall):
+                        self.__food_blits(i, j, blits)
+            rects = [self._screen.get_rect()]
+        else:
+            cells = set()
+            for si in sprites:
+                cells.add((si.x, si.y))
+                cells.add(previous.get(si, (si.x, si.y)))
+            for rect in (*self._sprite_rects, *covered):
+                if rect is not None:
+                    cells.update(self.__cells_under(rect))
+            rects = []
+            for i, j in cells:
+                rect = pygame.Rect(j * PXY, i * PXY, PXY, PXY)
+                blits.append((self._background, rect, rect))
+                rects.append(rect)
+                self.__food_blits(i, j, blits)
+
+        n_cells = len(blits)
+        for si in sprites:
+            # PacMan without lives is no longer on the board
+            if si not in self._board.at(si.x, si.y).my_sprites():
+                continue
+            px, py = previous.get(si, (si.x, si.y))
+            blits.append(self._atlas.blit_args(si, px + (si.x - px) * alpha, py + (si.y - py) * alpha))
 
-    if isinstance(sprit, Food):
-        x += PXY / 3
-        y += PXY / 3
+        drawn = self._screen.blits(blits)
+        self._sprite_rects = drawn[n_cells:]
+        rects.extend(self._sprite_rects)
 
-    pygame.draw.circle(screen, sprit.color, (y, x), int(PXY * sprit.size))
+        return rects
 
 
-def draw_text(surf, text: str, size: int, x: float, y: float):
+@lru_cache(maxsize=None)
+def font_path(name: str = FONT_NAME):
     """
-    Draws text on a pygame screen.
+    Returns path of a system font file, None if the font is not found and pygame's default font is used.
+    Searching system fonts is slow, so resolved paths are kept in the user cache directory
+    and searched again only when a cached file is gone. Delete the cache to find newly installed fonts.
+
+    Parameters
+    ----------
+    name: font name
+    """
+
+    cache = os.path.join(cache_dir(), FONT_CACHE)
+    try:
+        with open(cache, encoding="utf-8") as f:
+            paths = json.load(f)
+    except (OSError, ValueError):
+        paths = {}
+
+    if not isinstance(paths, dict):
+        paths = {}
+    if name in paths and (paths[name] is None or os.path.isfile(paths[name])):
+        return paths[name]
+
+    paths[name] = pygame.font.match_font(name)
+    try:
+        write_atomic(cache, json.dumps(paths, indent=2).encode("utf-8"))
+    except OSError:
+        # without a writable cache fonts are searched in every run
+        pass
+
+    return paths[name]
+
+
+@lru_cache(maxsize=None)
+def get_font(size: int):
+    """
+    Returns font of a certain size, loaded once per size.
+
+    Parameters
+    ----------
+    size: font size
+    """
+
+    return pygame.font.Font(font_path(), size)
+
+
+@lru_cache(maxsize=256)
+def render_text(text: str, size: int, color: tuple = WHITE):
+    """
+    Returns surface with rendered text, rendered once per text, size and color.
+    Callers must not draw on the returned surface.
+
+    Parameters
+    ----------
+    text: text to be rendered
+    size: text font size
+    color: text color
+    """
+
+    return get_font(size).render(text, True, color)
+
+
+def draw_text(surf, text: str, size: int, x: float, y: float, color: tuple = WHITE):
+    """
+    Draws text on a pygame screen, returns rectangle covering it.
 
     Parameters
     ----------
@@ -91,18 +369,18 @@ def draw_text(surf, text: str, size: int, x: float, y: float):
     size: text font size
     x: x coordinate of the text
     y: y coordinate of the text
+    color: text color
     """
 
-    font = pygame.font.Font(FONT_NAME, size)
-    text_surface = font.render(text, True, WHITE)
+    text_surface = render_text(text, size, color)
     text_rect = text_surface.get_rect()
     text_rect.midtop = (x, y)
-    surf.blit(text_surface, text_rect)
+    return surf.blit(text_surface, text_rect)
 
 
 def draw_lives(surf, x: float, y: float, lives: int):
     """
-    Draws circles representing remaining PacMan lives on a pygame screen.
+    Draws circles representing remaining PacMan lives on a pygame screen, returns rectangle covering them.
 
     Parameters
     ----------
@@ -112,9 +390,52 @@ def draw_lives(surf, x: float, y: float, lives: int):
     lives: number of lives to draw
     """
 
-    draw_text(window, "Lives: ", 24, x - 100, y - 15)
+    rect = draw_text(surf, "Lives: ", 24, x - 100, y - 15)
     for i in range(lives):
-        pygame.draw.circle(surf, WHITE, (x + 30 * i, y), int(PXY * 0.4))
+        rect.union_ip(pygame.draw.circle(surf, WHITE, (x + 30 * i, y), int(PXY * 0.4)))
+
+    return rect
+
+
+def draw_hud(surf, x: float, y: float, lives: int, points: int):
+    """
+    Draws remaining PacMan lives and points earned on a pygame screen, returns rectangle covering them.
+    Text is re-rendered only when the number of points changes.
+
+    Parameters
+    ----------
+    surf: pygame window
+    x: x coordinate of lives circles
+    y: y coordinate of lives circles
+    lives: number of lives to draw
+    points: number of points to draw
+    """
+
+    rect = draw_lives(surf, x, y, lives)
+    rect.union_ip(draw_text(surf, "Points: " + str(points), 24, x - 100, y + 15))
+
+    return rect
+
+
+def draw_profile(surf, profiler: TickProfiler, x: float = 5, y: float = 5):
+    """
+    Draws statistics of tick phases on a pygame screen, returns rectangle covering them.
+
+    Parameters
+    ----------
+    surf: pygame window
+    profiler: tick profiler
+    x: x coordinate of the left edge of text
+    y: y coordinate of the top edge of text
+    """
+
+    rect = pygame.Rect(x, y, 0, 0)
+
+    for line in profiler.lines():
+        text_surface = render_text(line, 16)
+        rect.union_ip(surf.blit(text_surface, (x, rect.bottom)))
+
+    return rect
 
 
 def show_go_screen(text1: str, text2: str = ""):
@@ -141,39 +462,65 @@ def show_go_screen(text1: str, text2: str = ""):
 
 if __name__ == "__main__":
 
-    # create board object
-    board = Board.board_from_str(board_drawn)
+    parser = argparse.ArgumentParser(description="PacMan game.")
+    parser.add_argument("--profile", action="store_true",
+                        help="time phases of ticks, print statistics on exit, F3 toggles on-screen statistics")
+    parser.add_argument("--two-phase", action="store_true",
+                        help="move all sprites at once each tick, so that sprites swapping cells collide")
+    parser.add_argument("--record", metavar="FILE", help="record the game to a replay file")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="play back a replay file, left and right arrows seek 50 ticks")
+    args = parser.parse_args()
 
-    WINDOW_WIDTH = board.width() * PXY
-    WINDOW_HEIGHT = board.height() * PXY
+    pc_mover = ManualWalk()
+    player = None
+    replay = None
 
-    # fill path cells with food
-    board.insert_food()
+    if args.replay:
+        # the game is re-simulated from the replay, keyboard only seeks
+        player = ReplayPlayer(Replay.load(args.replay))
+        engine = player.engine
+    else:
+        # create game engine: board filled with food, ghosts and PacMan
+        engine = GameEngine.new_game(board_drawn, pc_mover, two_phase=args.two_phase)
 
-    pc_mover = ManualWalk()
+        if args.record:
+            replay = Replay(engine.seed, board_drawn, DEFAULT_GHOST_STRATEGIES, two_phase=args.two_phase)
+
+            def save_replay():
+                replay.result = engine.result()
+                replay.save(args.record)
+
+            atexit.register(save_replay)
 
-    sprites = [
-        Ghost("g1", *board.random_cell(), RandomWalk()),
-        Ghost("g2", *board.random_cell(), RandomWalk()),
-        Ghost("g3", *board.random_cell(), PersistentWalk()),
-        Ghost("g4", *board.random_cell(), PersistentWalk()),
-        PacMan("pc", *board.random_cell(), pc_mover)
-    ]
+    board = engine.board
 
-    # insert sprites into board
-    for si in sprites:
-        board.insert(si)
+    profiler = NULL_PROFILER
+    if args.profile:
+        profiler = engine.profiler = TickProfiler()
+        atexit.register(profiler.dump, sys.stdout)
+    show_profile = False
+    profile_rect = None
+
+    WINDOW_WIDTH = board.width() * PXY
+    WINDOW_HEIGHT = board.height() * PXY
 
     pygame.init()
 
-    fps = 5
+    # game logic runs at tick_rate ticks per second, independently of frames drawn at fps
+    tick_rate = 5
+    fps = 60
     fpsclock = pygame.time.Clock()
+    timestep = FixedTimestep(tick_rate)
+    previous = {}
 
     was_pressed = pygame.key.get_pressed()
 
     window = pygame.display.set_mode((board.width() * PXY, board.height() * PXY))
     pygame.display.set_caption("PacMan")
-    draw_board(board, window)
+    renderer = BoardRenderer(board, window)
+    renderer.draw(engine.sprites)
+    hud_rect = None
 
     done = False
     game_over = True
@@ -182,70 +529,80 @@ if __name__ == "__main__":
 
         if game_over:
             show_go_screen("Press any key to start")
+            renderer.invalidate()
+            timestep.reset()
             game_over = False
 
-        # ---------- process external input
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                done = True
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
+        with profiler.phase("input"):
+            # ---------- process external input
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
                     done = True
                     pygame.quit()
                     sys.exit()
-
-        key_is_pressed = pygame.key.get_pressed()
-
-        # set pacman movement direction from keyboard
-        if key_is_pressed[pygame.K_UP] and not was_pressed[pygame.K_UP]:
-            pc_mover.direction = Direction.DOWN
-
-        elif key_is_pressed[pygame.K_RIGHT] and not was_pressed[pygame.K_RIGHT]:
-            pc_mover.direction = Direction.RIGHT
-
-        elif key_is_pressed[pygame.K_DOWN] and not was_pressed[pygame.K_DOWN]:
-            pc_mover.direction = Direction.UP
-
-        elif key_is_pressed[pygame.K_LEFT] and not was_pressed[pygame.K_LEFT]:
-            pc_mover.direction = Direction.LEFT
-
-        was_pressed = key_is_pressed
-
-        # move sprites
-        for si in sprites:
-            si.mover(board)
-
-            # check if pacman is on the board
-            count_pacman = board.count_by_type(PacMan)
-
-            if count_pacman == 0:
-                draw_board(board, window)
-                pygame.display.update()
-                points = 0
-                for sprite in sprites:
-                    if isinstance(sprite, PacMan):
-                        points = sprite.points
-                show_go_screen("Game Over", "Points: " + str(points))
-                done = True
-
-        # check number of food on the board
-        count_food = board.count_by_type(Food)
-
-        if count_food == 0:
-            draw_board(board, window)
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        done = True
+                        pygame.quit()
+                        sys.exit()
+                    if event.key == pygame.K_F3 and args.profile:
+                        show_profile = not show_profile
+                    if player is not None and event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                        player.seek(player.tick + (50 if event.key == pygame.K_RIGHT else -50))
+                        renderer.invalidate()
+                        previous = {}
+
+            key_is_pressed = pygame.key.get_pressed()
+
+            # set pacman movement direction from keyboard
+            if key_is_pressed[pygame.K_UP] and not was_pressed[pygame.K_UP]:
+                pc_mover.direction = Direction.DOWN
+
+            elif key_is_pressed[pygame.K_RIGHT] and not was_pressed[pygame.K_RIGHT]:
+                pc_mover.direction = Direction.RIGHT
+
+            elif key_is_pressed[pygame.K_DOWN] and not was_pressed[pygame.K_DOWN]:
+                pc_mover.direction = Direction.UP
+
+            elif key_is_pressed[pygame.K_LEFT] and not was_pressed[pygame.K_LEFT]:
+                pc_mover.direction = Direction.LEFT
+
+            was_pressed = key_is_pressed
+
+        # move sprites in whole ticks and check if the game has ended, the engine times phases of a tick
+        status = GameStatus.RUNNING
+        for _ in range(timestep.advance(fpsclock.get_time() / 1000)):
+            previous = {si: (si.x, si.y) for si in engine.sprites}
+            if player is not None:
+                status = player.step()
+                continue
+            if replay is not None:
+                replay.record_tick(pc_mover.direction)
+            status = engine.step()
+            if status is not GameStatus.RUNNING:
+                break
+
+        if status is not GameStatus.RUNNING:
+            previous = {}
+            renderer.draw(engine.sprites)
             pygame.display.update()
-            points = 0
-            for sprite in sprites:
-                if isinstance(sprite, PacMan):
-                    points = sprite.points
-            show_go_screen("YOU WIN!", "Points: " + str(points))
+            show_go_screen("Game Over" if status is GameStatus.LOST else "YOU WIN!",
+                           "Points: " + str(engine.pacman.points))
+            renderer.invalidate()
             done = True
 
-        draw_board(board, window)
-        draw_lives(window, WINDOW_WIDTH * 0.9, WINDOW_HEIGHT * 0.05, sprites[-1].lives)  # PacMan is last in sprites
-        pygame.display.update()
+        with profiler.phase("render"):
+            # redraw changed cells and cells under text drawn in the last frame, update only those
+            dirty = renderer.draw(engine.sprites, previous, timestep.alpha, [hud_rect, profile_rect])
+            hud_rect = draw_hud(window, WINDOW_WIDTH * 0.9, WINDOW_HEIGHT * 0.05,
+                                engine.pacman.lives, engine.pacman.points)
+            dirty.append(hud_rect)
+            profile_rect = draw_profile(window, profiler) if show_profile else None
+            if profile_rect is not None:
+                dirty.append(profile_rect)
+
+        with profiler.phase("display"):
+            pygame.display.update(dirty)
 
         fpsclock.tick(fps)
 